@@ -0,0 +1,226 @@
+"""Load test of the VGN Departures integration inside a Home Assistant instance.
+
+Sets up many config entries on a synthetic GTFS feed and runs coordinator refreshes
+for a simulated day with a frozen clock. Requires the packages of requirements.txt,
+run from this directory with:
+
+    VGN_LOAD_ENTRIES=50 pytest -s load_test.py
+
+Reported metrics:
+- event loop lag: CPU time of the event loop thread per refresh tick (max, p95),
+  nothing else can run on the loop during that time
+- CPU time: process CPU time of the simulated day (event loop and executor)
+- state writes: number of state_changed events of integration entities
+- peak memory: peak of traced Python allocations and max resident set size
+"""
+
+from datetime import datetime, timedelta
+import json
+import os
+import resource
+import time
+import tracemalloc
+import zipfile
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.vgn_departures.const import (  # noqa: E402
+    CFG_CONNECTIONS,
+    CFG_STOP,
+    DOMAIN,
+    FETCH_UPDATE_INTERVAL,
+)
+from custom_components.vgn_departures.coordinator import get_api  # noqa: E402
+from custom_components.vgn_departures.vgn import api_gtfs  # noqa: E402
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import Event, HomeAssistant  # noqa: E402
+from homeassistant.util import dt as dt_util, slugify  # noqa: E402
+
+# number of config entries, every entry has one stop with LINES * 2 connections
+ENTRIES = int(os.environ.get("VGN_LOAD_ENTRIES", "50"))
+LINES = int(os.environ.get("VGN_LOAD_LINES", "3"))
+# simulated time span in hours
+HOURS = int(os.environ.get("VGN_LOAD_HOURS", "24"))
+# headway of every line in minutes
+HEADWAY = int(os.environ.get("VGN_LOAD_HEADWAY", "10"))
+# fail if a single refresh tick blocks the event loop longer (milliseconds)
+MAX_LAG = float(os.environ.get("VGN_LOAD_MAX_LAG_MS", "250"))
+# optional path of a JSON report
+REPORT = os.environ.get("VGN_LOAD_REPORT")
+
+START = datetime(2026, 10, 19, 4, 0, tzinfo=dt_util.get_time_zone("Europe/Berlin"))
+
+
+def write_feed(path: str) -> None:
+    """Write synthetic GTFS feed: every line runs through all stops in both directions."""
+    stops = ["stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station"]
+    routes = ["route_id,agency_id,route_short_name,route_type"]
+    trips = ["route_id,service_id,trip_id,trip_headsign,direction_id"]
+    stop_times = ["trip_id,arrival_time,departure_time,stop_id,stop_sequence"]
+
+    for stop in range(ENTRIES):
+        stops.append(
+            f"s{stop},Load Stop {stop},{49.4 + stop * 0.002},{11.0 + stop * 0.002},0,"
+        )
+
+    for line in range(LINES):
+        routes.append(f"r{line},a1,{line + 1},3")
+
+        for direction in range(2):
+            order = range(ENTRIES) if direction == 0 else reversed(range(ENTRIES))
+
+            for run, start in enumerate(range(5 * 3600, 24 * 3600, HEADWAY * 60)):
+                trip_id = f"t{line}_{direction}_{run}"
+                trips.append(
+                    f"r{line},s1,{trip_id},Line {line + 1} Richtung {direction},{direction}"
+                )
+
+                for sequence, stop in enumerate(order):
+                    secs = start + line * 60 + sequence * 90
+                    hhmmss = f"{secs // 3600:02}:{secs // 60 % 60:02}:{secs % 60:02}"
+                    stop_times.append(f"{trip_id},{hhmmss},{hhmmss},s{stop},{sequence}")
+
+    tables = {
+        "agency.txt": [
+            "agency_id,agency_name,agency_url,agency_timezone",
+            "a1,Load,https://example.com,Europe/Berlin",
+        ],
+        "stops.txt": stops,
+        "routes.txt": routes,
+        "trips.txt": trips,
+        "stop_times.txt": stop_times,
+        "calendar.txt": [
+            "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date",
+            "s1,1,1,1,1,1,1,1,20240101,20301231",
+        ],
+        # one exception outside the simulated day, so the table has typed columns
+        "calendar_dates.txt": ["service_id,date,exception_type", "s1,20301225,2"],
+    }
+
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, lines in tables.items():
+            archive.writestr(name, "\n".join(lines) + "\n")
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable loading of custom integrations."""
+    yield
+
+
+@pytest.fixture
+def gtfs_feed(tmp_path, monkeypatch):
+    """Provide synthetic GTFS feed as the only feed of the integration."""
+    path = tmp_path / "GTFS.zip"
+    write_feed(str(path))
+
+    monkeypatch.setattr(api_gtfs, "GTFS_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(api_gtfs, "GTFS_LOCATION", str(path))
+
+    return path
+
+
+async def _async_create_entries(hass: HomeAssistant) -> list[MockConfigEntry]:
+    """Create one config entry per stop with all connections of the stop."""
+    api = get_api(hass)
+    await api.ensure_loaded()
+
+    entries = []
+
+    for stop in await api.stops():
+        connections = await api.connections(stop)
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title=stop.name,
+            version=2,
+            unique_id=slugify(stop.name),
+            data={
+                CFG_STOP: stop.to_dict(),
+                CFG_CONNECTIONS: [x.to_dict() for x in connections],
+            },
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    return entries
+
+
+async def test_load_simulated_day(hass: HomeAssistant, freezer, gtfs_feed) -> None:
+    """Run coordinator refreshes of all entries for a simulated day and report metrics."""
+    await hass.config.async_set_time_zone("Europe/Berlin")
+    freezer.move_to(START)
+
+    entries = await _async_create_entries(hass)
+
+    for entry in entries:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    sensors = hass.states.async_entity_ids("sensor")
+    assert len(sensors) == sum(len(x.data[CFG_CONNECTIONS]) for x in entries)
+
+    state_writes = 0
+
+    def _count_state_write(event: Event) -> None:
+        nonlocal state_writes
+        state_writes += 1
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _count_state_write)
+
+    ticks = HOURS * 3600 // FETCH_UPDATE_INTERVAL
+    lags: list[float] = []
+
+    tracemalloc.start()
+    cpu_start = time.process_time()
+
+    for _ in range(ticks):
+        freezer.tick(timedelta(seconds=FETCH_UPDATE_INTERVAL))
+
+        # clock is frozen, CPU time of the loop thread is not affected by freezegun
+        tick_start = time.thread_time()
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        lags.append((time.thread_time() - tick_start) * 1000)
+
+    cpu_time = time.process_time() - cpu_start
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lags.sort()
+    report = {
+        "entries": len(entries),
+        "sensors": len(sensors),
+        "simulated_hours": HOURS,
+        "ticks": ticks,
+        "loop_lag_max_ms": round(lags[-1], 3),
+        "loop_lag_p95_ms": round(lags[int(len(lags) * 0.95)], 3),
+        "cpu_time_s": round(cpu_time, 3),
+        "state_writes": state_writes,
+        "state_writes_per_sensor": round(state_writes / len(sensors), 1),
+        "peak_traced_mb": round(peak_traced / 2**20, 1),
+        "max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+    print(json.dumps(report, indent=2))
+
+    if REPORT:
+        with open(REPORT, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    # a sensor changes its state once per departure (plus small changes of attributes),
+    # more writes mean unchanged states are written again
+    departures_per_sensor = HOURS * 60 // HEADWAY
+    assert state_writes <= len(sensors) * departures_per_sensor * 2
+    assert lags[-1] <= MAX_LAG
+
+    for entry in entries:
+        assert await hass.config_entries.async_unload(entry.entry_id)
@@ -1,34 +1,86 @@
 """VGN Departures integration."""
 
+from datetime import datetime, timedelta
 import logging
 
 from homeassistant import core
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import ConfigType
 
-from .coordinator import VgnUpdateCoordinator
+from .const import DATA_FEED_UPDATE, DOMAIN, FEED_UPDATE_INTERVAL
+from .coordinator import VgnUpdateCoordinator, get_api, get_snapshot_store
+from .services import async_setup_services
+from .vgn.exceptions import GtfsFileNotFound
+from .websocket_api import async_setup_websocket_api
 
 PLATFORMS = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 _LOGGER = logging.getLogger(__name__)
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up VGN Departures services and websocket commands."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+
+    return True
+
+
 async def async_setup_entry(hass: core.HomeAssistant, entry: ConfigEntry) -> bool:
     """Configure VGN departure config entry."""
     _LOGGER.debug("Setting up entry: %s", entry.data)
 
-    coordinator = VgnUpdateCoordinator(hass, entry.title, entry.data)
+    coordinator = VgnUpdateCoordinator(hass, entry.entry_id, entry.title, entry.data)
 
     entry.runtime_data = coordinator
 
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
+    _async_setup_feed_update(hass)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(coordinator.async_cancel_warm_up)
+
+    # do not block startup while GTFS data is parsed, entities stay unavailable until then
+    entry.async_create_background_task(
+        hass, coordinator.async_warm_up(), f"{DOMAIN} warm up {entry.title}"
+    )
+
     return True
 
 
+@callback
+def _async_setup_feed_update(hass: HomeAssistant) -> None:
+    """Check periodically for new GTFS feed files, shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if DATA_FEED_UPDATE in domain_data:
+        return
+
+    async def _async_update_feed(now: datetime) -> None:
+        api = get_api(hass)
+
+        if not api.loaded:
+            return
+
+        try:
+            if await api.update():
+                _LOGGER.info("GTFS data updated to generation %s", api.generation)
+        except GtfsFileNotFound as err:
+            _LOGGER.warning("Failed updating GTFS data: %s", err)
+
+    domain_data[DATA_FEED_UPDATE] = async_track_time_interval(
+        hass, _async_update_feed, timedelta(seconds=FEED_UPDATE_INTERVAL)
+    )
+
+
 async def _async_update_listener(hass: HomeAssistant, entry) -> None:
     await hass.config_entries.async_reload(entry.entry_id)
 
@@ -36,3 +88,18 @@ async def _async_update_listener(hass: HomeAssistant, entry) -> None:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove snapshot of the entry, release shared GTFS data once the last config entry is removed."""
+    await get_snapshot_store(hass, entry.entry_id).async_remove()
+
+    if not [
+        x
+        for x in hass.config_entries.async_entries(DOMAIN)
+        if x.entry_id != entry.entry_id
+    ]:
+        domain_data = hass.data.pop(DOMAIN, {})
+
+        if unsub := domain_data.get(DATA_FEED_UPDATE):
+            unsub()
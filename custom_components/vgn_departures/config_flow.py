@@ -15,6 +15,8 @@ from homeassistant.util import Any, slugify
 
 from .const import (
     CFG_CONNECTIONS,
+    CFG_DEPARTURE_BOARD,
+    CFG_DESTINATION,
     CFG_ERROR_ALREADY_CONFIGURED,
     CFG_ERROR_GTFS_NOT_FOUND,
     CFG_ERROR_NO_CHANGES_OPTIONS,
@@ -22,6 +24,13 @@ from .const import (
     CFG_STOP,
     CFG_STOP_NAME,
     DOMAIN,
+    STATISTIC_KEYS,
+)
+from .coordinator import (
+    get_api,
+    get_departure_board_uid,
+    get_journey_uid,
+    get_statistic_uid,
 )
 from .vgn.api_gtfs import ApiGtfs
 from .vgn.data_classes import Connection, Stop
@@ -70,20 +79,60 @@ def get_select_connection_option_from_obj(connection: Connection) -> dict[str, s
     return {uid: f"{transport} - {line_name} - {name}"}
 
 
+def get_stop_name_options(stops: list[Stop], nearby: list[Stop]) -> list[str]:
+    """Return names of all stops, stops near home first (closest first) followed by all other stops."""
+    names = [x.name for x in nearby]
+    nearby_names = set(names)
+
+    return names + [x.name for x in stops if x.name not in nearby_names]
+
+
+def get_destination_selector(stops: list[Stop]):
+    """Return selector to choose an optional journey destination."""
+    return selector(
+        {
+            "select": {
+                "options": [x.name for x in stops],
+                "mode": "dropdown",
+                "custom_value": False,
+                "sort": True,
+            }
+        }
+    )
+
+
+def find_destination(stops: list[Stop], name: str | None) -> Stop | None:
+    """Return stop with provided name or None if no destination was chosen."""
+    if not name:
+        return None
+
+    return next(filter(lambda x: x.name == name, stops), None)
+
+
 class OptionsFlowHandler(OptionsFlow):
     """Options flow handler for VGN Departures config entry."""
 
-    def __init__(self, stop: dict, connections: list[dict]) -> None:
+    def __init__(
+        self,
+        stop: dict,
+        connections: list[dict],
+        destination: dict | None = None,
+        departure_board: bool = False,
+    ) -> None:
         """Initialize options flow."""
         self._stop: dict = stop
+        self._destination: Stop | None = Stop.from_dict(destination)
+        self._departure_board: bool = departure_board
         self._selected_connections: list[dict] = [
             Connection.from_dict(x) for x in connections
         ]
-        self._api: ApiGtfs = ApiGtfs()
+        self._api: ApiGtfs | None = None
         # list of all available for _stop connections
         self._all_connections: list[Connection] = []
         # list of uid(s) selected for this configuration entry
         self._selected_uids: list[str] = [x.uid for x in self._selected_connections]
+        # list of all stops available as journey destination
+        self._all_stops: list[Stop] = []
 
         _LOGGER.debug("Start options dialog")
         _LOGGER.debug("Stop: %s", self._stop)
@@ -108,7 +157,17 @@ class OptionsFlowHandler(OptionsFlow):
                 )
             )
 
-            if not removed_connections and not added_connections:
+            destination = find_destination(
+                self._all_stops, user_input.get(CFG_DESTINATION)
+            )
+            departure_board = user_input.get(CFG_DEPARTURE_BOARD, False)
+
+            if (
+                not removed_connections
+                and not added_connections
+                and destination == self._destination
+                and departure_board == self._departure_board
+            ):
                 _LOGGER.debug("No changes on entry configuration detected")
                 return self.async_abort(reason=CFG_ERROR_NO_CHANGES_OPTIONS)
 
@@ -127,8 +186,32 @@ class OptionsFlowHandler(OptionsFlow):
 
                 entity_registry.async_remove(connections_map[uid])
 
+                for key in STATISTIC_KEYS:
+                    if (
+                        statistic_uid := get_statistic_uid(uid, key)
+                    ) in connections_map:
+                        entity_registry.async_remove(connections_map[statistic_uid])
+
                 updated_config = [e for e in updated_config if e["uid"] != uid]
 
+            # delete journey sensor if destination was changed or removed
+            if self._destination and destination != self._destination:
+                uid = get_journey_uid(Stop.from_dict(self._stop), self._destination)
+
+                if uid in connections_map:
+                    _LOGGER.debug("Remove journey with uid:%s", uid)
+
+                    entity_registry.async_remove(connections_map[uid])
+
+            # delete departure board if disabled by user
+            if self._departure_board and not departure_board:
+                uid = get_departure_board_uid(Stop.from_dict(self._stop))
+
+                if uid in connections_map:
+                    _LOGGER.debug("Remove departure board with uid:%s", uid)
+
+                    entity_registry.async_remove(connections_map[uid])
+
             # add new connection(s) added be user
             for connection in added_connections:
                 _LOGGER.debug("Add connection with uid:%s", connection.uid)
@@ -138,20 +221,31 @@ class OptionsFlowHandler(OptionsFlow):
             data = {
                 CFG_STOP: self._stop,
                 CFG_CONNECTIONS: updated_config,
+                CFG_DESTINATION: destination.to_dict() if destination else None,
+                CFG_DEPARTURE_BOARD: departure_board,
             }
 
             self.hass.config_entries.async_update_entry(self.config_entry, data=data)
 
             return self.async_create_entry(data=data)
 
+        self._api = get_api(self.hass)
+
         try:
-            await self._api.load()
+            await self._api.ensure_loaded()
         except GtfsFileNotFound:
             return self.async_abort(reason=CFG_ERROR_GTFS_NOT_FOUND)
 
         self._all_connections: list[dict] = await self._api.connections(
             Stop.from_dict(self._stop)
         )
+        self._all_stops = await self._api.stops()
+
+        destination_key = (
+            vol.Optional(CFG_DESTINATION, default=self._destination.name)
+            if self._destination
+            else vol.Optional(CFG_DESTINATION)
+        )
 
         return self.async_show_form(
             step_id="init",
@@ -163,6 +257,10 @@ class OptionsFlowHandler(OptionsFlow):
                     ): cv.multi_select(
                         get_select_connections_options(self._all_connections)
                     ),
+                    destination_key: get_destination_selector(self._all_stops),
+                    vol.Optional(
+                        CFG_DEPARTURE_BOARD, default=self._departure_board
+                    ): cv.boolean,
                 }
             ),
         )
@@ -178,7 +276,7 @@ class FlowHandler(ConfigFlow, domain=DOMAIN):
         """Initialize flow handler."""
         super().__init__()
 
-        self._api: ApiGtfs = ApiGtfs()
+        self._api: ApiGtfs | None = None
         # list of all "stops" available in GTFS
         # one bus stop can have multiple stop objects: for each drive direction and transport type
         self._all_stops: Stop[str] = []
@@ -218,14 +316,21 @@ class FlowHandler(ConfigFlow, domain=DOMAIN):
             if not errors:
                 return await self.async_step_connections()
 
+        self._api = get_api(self.hass)
+
         try:
-            await self._api.load()
+            await self._api.ensure_loaded()
         except GtfsFileNotFound:
             return self.async_abort(reason=CFG_ERROR_GTFS_NOT_FOUND)
 
         self._all_stops = await self._api.stops()
+        nearby_stops = await self._api.stops_near(
+            self.hass.config.latitude, self.hass.config.longitude
+        )
 
-        _LOGGER.debug("Loaded %s stop(s)", len(self._all_stops))
+        _LOGGER.debug(
+            "Loaded %s stop(s), %s near home", len(self._all_stops), len(nearby_stops)
+        )
 
         return self.async_show_form(
             step_id="user",
@@ -234,10 +339,13 @@ class FlowHandler(ConfigFlow, domain=DOMAIN):
                     vol.Required(CFG_STOP_NAME): selector(
                         {
                             "select": {
-                                "options": [x.name for x in self._all_stops],
+                                "options": get_stop_name_options(
+                                    self._all_stops, nearby_stops
+                                ),
                                 "mode": "dropdown",
                                 "custom_value": True,
-                                "sort": True,
+                                # keep stops near home on top
+                                "sort": False,
                             }
                         }
                     )
@@ -253,6 +361,7 @@ class FlowHandler(ConfigFlow, domain=DOMAIN):
         _LOGGER.debug("Start 'step_connections': %s", user_input)
 
         errors = {}
+        placeholders = {}
 
         if user_input is not None:
             connections = list(
@@ -260,15 +369,24 @@ class FlowHandler(ConfigFlow, domain=DOMAIN):
                     lambda x: x.uid in user_input[CFG_CONNECTIONS], self._connections
                 )
             )
-
-            return self.async_create_entry(
-                title=self._stop.name,
-                data={
-                    CFG_STOP: self._stop.to_dict(),
-                    CFG_CONNECTIONS: [x.to_dict() for x in connections],
-                },
+            destination = find_destination(
+                self._all_stops, user_input.get(CFG_DESTINATION)
             )
 
+            if user_input.get(CFG_DESTINATION) and destination is None:
+                errors[CFG_DESTINATION] = CFG_ERROR_STOP_NOT_FOUND
+                placeholders[CFG_STOP_NAME] = user_input[CFG_DESTINATION]
+            else:
+                return self.async_create_entry(
+                    title=self._stop.name,
+                    data={
+                        CFG_STOP: self._stop.to_dict(),
+                        CFG_CONNECTIONS: [x.to_dict() for x in connections],
+                        CFG_DESTINATION: destination.to_dict() if destination else None,
+                        CFG_DEPARTURE_BOARD: user_input.get(CFG_DEPARTURE_BOARD, False),
+                    },
+                )
+
         self._connections: list[dict] = await self._api.connections(self._stop)
 
         return self.async_show_form(
@@ -278,9 +396,14 @@ class FlowHandler(ConfigFlow, domain=DOMAIN):
                     vol.Required(CFG_CONNECTIONS, default=[]): cv.multi_select(
                         get_select_connections_options(self._connections)
                     ),
+                    vol.Optional(CFG_DESTINATION): get_destination_selector(
+                        self._all_stops
+                    ),
+                    vol.Optional(CFG_DEPARTURE_BOARD, default=False): cv.boolean,
                 }
             ),
             errors=errors,
+            description_placeholders=placeholders,
         )
 
     @staticmethod
@@ -291,5 +414,8 @@ class FlowHandler(ConfigFlow, domain=DOMAIN):
         """Create the options flow."""
 
         return OptionsFlowHandler(
-            config_entry.data[CFG_STOP], config_entry.data[CFG_CONNECTIONS]
+            config_entry.data[CFG_STOP],
+            config_entry.data[CFG_CONNECTIONS],
+            config_entry.data.get(CFG_DESTINATION),
+            config_entry.data.get(CFG_DEPARTURE_BOARD, False),
         )
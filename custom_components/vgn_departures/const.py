@@ -4,16 +4,63 @@ from typing import Final
 
 DOMAIN = "vgn_departures"
 
+# hass.data keys
+DATA_API: Final = "api"
+DATA_FEED_UPDATE: Final = "feed_update"
+DATA_PROFILER: Final = "profiler"
+DATA_DEPARTURE_WINDOWS: Final = "departure_windows"
+
+# Services
+SERVICE_PROFILE: Final = "profile"
+ATTR_SECONDS: Final = "seconds"
+ATTR_METHOD: Final = "method"
+SERVICE_GET_DEPARTURES: Final = "get_departures"
+ATTR_STOP: Final = "stop"
+ATTR_START: Final = "start"
+ATTR_END: Final = "end"
+MAX_QUERY_DAYS = 31  # maximum range of a departures query
+
+# Websocket API
+WS_SUBSCRIBE_DEPARTURES: Final = f"{DOMAIN}/subscribe_departures"
+ATTR_STOPS: Final = "stops"
+ATTR_MINUTES: Final = "minutes"
+ATTR_DEPARTED: Final = "departed"
+ATTR_ADDED: Final = "added"
+ATTR_REMOVED: Final = "removed"
+ATTR_ID: Final = "id"
+
 
 # fetch update interval
 FETCH_UPDATE_INTERVAL = 30  # seconds
 REQUEST_TIME_SPAN = 60  # minutes
 MAX_DEPARTURES = 5
+FEED_UPDATE_INTERVAL = 3600  # seconds, check for new GTFS files
+WARM_UP_RETRY_INTERVAL = 30  # seconds, first retry of a failed GTFS load
+WARM_UP_RETRY_MAX_INTERVAL = 1800  # seconds, retries are doubled up to this
+
+# warm start snapshot of upcoming departures
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_HORIZON = 36  # hours, departures stored in a snapshot
+SNAPSHOT_MIN_HORIZON = 24  # hours, snapshot is renewed if it covers less
+
+# statistic sensors of a connection
+STATISTIC_MINUTES_UNTIL_DEPARTURE: Final = "minutes_until_departure"
+STATISTIC_HEADWAY: Final = "headway"
+STATISTIC_REMAINING_TODAY: Final = "remaining_today"
+STATISTIC_LAST_DEPARTURE_TODAY: Final = "last_departure_today"
+STATISTIC_KEYS: Final = (
+    STATISTIC_MINUTES_UNTIL_DEPARTURE,
+    STATISTIC_HEADWAY,
+    STATISTIC_REMAINING_TODAY,
+    STATISTIC_LAST_DEPARTURE_TODAY,
+)
 
 # Config entry data
 CFG_STOP_NAME: Final = "stop_name"
 CFG_STOP: Final = "stop"
 CFG_CONNECTIONS: Final = "connections"
+CFG_DESTINATION: Final = "destination"
+CFG_DEPARTURE_BOARD: Final = "departure_board"
 
 CFG_ERROR_GTFS_NOT_FOUND = "error_gtfs_not_found"
 CFG_ERROR_STOP_NOT_FOUND = "error_stop_not_found"
@@ -31,3 +78,8 @@ ATTR_DEPARTURES: Final = "departures"
 ATTR_OCCUPANCY_LEVEL: Final = "occupancy_level"
 ATTR_PLANNED_DEPARTURE_TIME: Final = "planned_departure_time"
 ATTR_ACTUAL_DEPARTURE_TIME: Final = "actual_departure_time"
+ATTR_ORIGIN: Final = "origin"
+ATTR_DESTINATION: Final = "destination"
+ATTR_ARRIVAL_TIME: Final = "arrival_time"
+ATTR_TRANSFERS: Final = "transfers"
+ATTR_LEGS: Final = "legs"
@@ -1,24 +1,127 @@
 """The VGN Departures update coordinator."""
 
-from datetime import timedelta
+from datetime import datetime, timedelta
+import heapq
+from itertools import islice, repeat
 import logging
 
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.util import dt as dt_util
+import polars as pl
 
-from .const import CFG_CONNECTIONS, FETCH_UPDATE_INTERVAL
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    ATTR_DIRECTION_TEXT,
+    ATTR_LINE_NAME,
+    ATTR_PLANNED_DEPARTURE_TIME,
+    ATTR_STOP_ID,
+    ATTR_TRANSPORT_TYPE,
+    CFG_CONNECTIONS,
+    CFG_DEPARTURE_BOARD,
+    CFG_DESTINATION,
+    CFG_STOP,
+    DATA_API,
+    DOMAIN,
+    FETCH_UPDATE_INTERVAL,
+    MAX_DEPARTURES,
+    SNAPSHOT_HORIZON,
+    SNAPSHOT_MIN_HORIZON,
+    SNAPSHOT_STORAGE_VERSION,
+    WARM_UP_RETRY_INTERVAL,
+    WARM_UP_RETRY_MAX_INTERVAL,
+)
 from .vgn.api_gtfs import ApiGtfs
-from .vgn.data_classes import Connection, Departures
+from .vgn.data_classes import Connection, Departures, Stop
 from .vgn.exceptions import GtfsFileNotFound
+from .vgn.helpers import TIMEZONE
+from .vgn.statistics import (
+    DepartureStatistics,
+    departure_statistics,
+    timestamps,
+    window_bounds,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@callback
+def get_api(hass: HomeAssistant) -> ApiGtfs:
+    """Return GTFS api instance shared by all config entries and flows."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if DATA_API not in domain_data:
+        domain_data[DATA_API] = ApiGtfs()
+
+    return domain_data[DATA_API]
+
+
+def get_journey_uid(stop: Stop, destination: Stop) -> str:
+    """Return unique id of the journey from stop to destination."""
+    return slugify(f"{stop.name}#{destination.name}#journey")
+
+
+def get_departure_board_uid(stop: Stop) -> str:
+    """Return unique id of the departure board of a stop."""
+    return slugify(f"{stop.name}#departure_board")
+
+
+def get_statistic_uid(connection_uid: str, key: str) -> str:
+    """Return unique id of a statistic sensor of a connection."""
+    return f"{connection_uid}_{key}"
+
+
+def get_departure_dict(time: datetime, connection: Connection) -> dict[str, str]:
+    """Return JSON serializable description of a single departure."""
+    return {
+        ATTR_PLANNED_DEPARTURE_TIME: time.isoformat(),
+        ATTR_STOP_ID: connection.stop_id,
+        ATTR_LINE_NAME: connection.line_name,
+        ATTR_TRANSPORT_TYPE: str(connection.transport),
+        ATTR_DIRECTION_TEXT: connection.name,
+    }
+
+
+@callback
+def get_snapshot_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Return store of the warm start snapshot of a config entry."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+
+@callback
+def get_entity_connection(hass: HomeAssistant, entity_id: str) -> Connection:
+    """Return connection of a departure sensor entity."""
+    entity = er.async_get(hass).async_get(entity_id)
+
+    if entity is None or entity.platform != DOMAIN:
+        raise HomeAssistantError(f"{entity_id} is not a VGN Departures entity")
+
+    entry = hass.config_entries.async_get_entry(entity.config_entry_id)
+    coordinator = getattr(entry, "runtime_data", None) if entry else None
+
+    connection = next(
+        (
+            x
+            for x in (coordinator.connections if coordinator else [])
+            if x.uid == entity.unique_id
+        ),
+        None,
+    )
+
+    if connection is None:
+        raise HomeAssistantError(f"{entity_id} is not a departure sensor")
+
+    return connection
+
+
 class VgnUpdateCoordinator(DataUpdateCoordinator):
     """Coordinator class for VGN Departures component updates."""
 
-    def __init__(self, hass: HomeAssistant, title: str, data) -> None:
+    def __init__(self, hass: HomeAssistant, entry_id: str, title: str, data) -> None:
         """Bla bla."""
         super().__init__(
             hass,
@@ -33,9 +136,32 @@ class VgnUpdateCoordinator(DataUpdateCoordinator):
         self._connections: list[Connection] = [
             Connection.from_dict(x) for x in data[CFG_CONNECTIONS]
         ]
-        self._api: ApiGtfs = ApiGtfs()
+        self._stop: Stop | None = Stop.from_dict(data.get(CFG_STOP))
+        self._destination: Stop | None = Stop.from_dict(data.get(CFG_DESTINATION))
+        self._departure_board: bool = data.get(CFG_DEPARTURE_BOARD, False)
+        self._api: ApiGtfs = get_api(hass)
+        self._store: Store = get_snapshot_store(hass, entry_id)
+        # departures restored from snapshot are served until GTFS data is loaded
+        self._restored: bool = False
+        # feed generation and end of the departures covered by the stored snapshot
+        self._snapshot_generation: str | None = None
+        self._snapshot_until: datetime | None = None
+        # departure times of the day per connection (as received and as timestamps)
+        self._timelines: dict[str, tuple[list[datetime], pl.Series]] = {}
+        # statistics per connection with update time and window bounds they belong to
+        self._statistics: dict[
+            str, tuple[datetime, tuple[int, int, int, int], DepartureStatistics]
+        ] = {}
+        self._updated_at: datetime | None = None
+        # failed GTFS loads are retried with increasing interval
+        self._warm_up_retries: int = 0
+        self._load_error: Exception | None = None
+        self._unsub_warm_up_retry: CALLBACK_TYPE | None = None
         self.data: dict[str, dict] = {conn.uid: {} for conn in self._connections}
 
+        if self._destination:
+            self.data[self.journey_uid] = {}
+
     @property
     def title(self) -> str:
         """Return entry title."""
@@ -46,24 +172,165 @@ class VgnUpdateCoordinator(DataUpdateCoordinator):
         """Return connections udpated by this coordinator."""
         return self._connections
 
-    async def _async_setup(self) -> dict[str, dict]:
-        _LOGGER.debug("Setup coordinator '%s'", self.title)
+    @property
+    def stop(self) -> Stop | None:
+        """Return stop configured for this entry."""
+        return self._stop
+
+    @property
+    def destination(self) -> Stop | None:
+        """Return journey destination or None if no journey is configured."""
+        return self._destination
+
+    @property
+    def departure_board(self) -> bool:
+        """Return whether an aggregated departure board is configured."""
+        return self._departure_board
+
+    @property
+    def journey_uid(self) -> str:
+        """Return unique id of the journey from entry stop to destination."""
+        return get_journey_uid(self._stop, self._destination)
+
+    def next_departures(
+        self, count: int = MAX_DEPARTURES
+    ) -> list[tuple[datetime, Connection]]:
+        """Return next departures over all connections of this entry.
+
+        Departure times of every connection are already sorted, so the lists are
+        combined by a k-way merge and only the first items are consumed.
+        """
+        timelines = [
+            zip(self.data[connection.uid].get("times", []), repeat(connection))
+            for connection in self._connections
+        ]
+
+        return list(islice(heapq.merge(*timelines, key=lambda x: x[0]), count))
+
+    @property
+    def updated_at(self) -> datetime | None:
+        """Return time of the last update of departures."""
+        return self._updated_at
+
+    def statistics(self, connection: Connection) -> DepartureStatistics | None:
+        """Return statistics of a connection at the time of the last update.
+
+        Statistics are recomputed only if the departure times or the window bounds
+        (next departure, end of next hour, end of day) have changed.
+        """
+        if (timeline := self._timelines.get(connection.uid)) is None:
+            return None
+
+        cached = self._statistics.get(connection.uid)
+
+        # all statistic sensors of a connection ask after the same update
+        if cached and cached[0] == self._updated_at:
+            return cached[2]
+
+        bounds = window_bounds(timeline[1], self._updated_at)
+
+        if cached and cached[1] == bounds:
+            statistics = cached[2]
+        else:
+            statistics = departure_statistics(timeline[1], bounds)
+
+        self._statistics[connection.uid] = (self._updated_at, bounds, statistics)
+
+        return statistics
+
+    def _set_timeline(self, connection: Connection, times: list[datetime]) -> None:
+        """Set departure times of a connection, timestamps are only built for changed times."""
+        timeline = self._timelines.get(connection.uid)
+
+        if timeline is None or (timeline[0] is not times and timeline[0] != times):
+            self._timelines[connection.uid] = (times, timestamps(times))
+            self._statistics.pop(connection.uid, None)
+
+    @property
+    def is_ready(self) -> bool:
+        """Return whether GTFS data is loaded and departures can be answered."""
+        return self._api.loaded or self._restored
+
+    async def async_warm_up(self) -> None:
+        """Load GTFS data in background and refresh data as soon as it is available.
+
+        Until then departures of the last snapshot are served if it was created from
+        the same feed files.
+        """
+        _LOGGER.debug("Warm up coordinator '%s'", self.title)
+
+        self._unsub_warm_up_retry = None
+
+        if not self._api.loaded and not self._restored:
+            await self._async_restore_snapshot()
+
         try:
-            await self._api.load()
-        except GtfsFileNotFound:
-            _LOGGER.error("Failed loading GTFS files")
-            raise
+            await self._api.ensure_loaded()
+        except Exception as err:
+            delay = min(
+                WARM_UP_RETRY_INTERVAL * 2**self._warm_up_retries,
+                WARM_UP_RETRY_MAX_INTERVAL,
+            )
+            self._warm_up_retries += 1
+            self._load_error = err
+
+            _LOGGER.error("Failed loading GTFS files, retry in %ss: %s", delay, err)
+            self.async_set_update_error(err)
+            self._unsub_warm_up_retry = async_call_later(
+                self.hass, delay, self._async_retry_warm_up
+            )
+            return
+
+        self._warm_up_retries = 0
+        self._load_error = None
+
+        await self.async_refresh()
+
+    async def _async_retry_warm_up(self, _now: datetime) -> None:
+        await self.async_warm_up()
+
+    @callback
+    def async_cancel_warm_up(self) -> None:
+        """Cancel a scheduled retry of the GTFS load."""
+        if self._unsub_warm_up_retry:
+            self._unsub_warm_up_retry()
+            self._unsub_warm_up_retry = None
 
     async def _async_update_data(self):
         _LOGGER.debug("Start update data for '%s'", self.title)
 
         current_time = dt_util.now().replace(second=0, microsecond=0)
 
+        if not self._api.loaded:
+            _LOGGER.debug("GTFS data not loaded yet, skip update")
+
+            if not self._restored:
+                # keeps entities unavailable and the load error visible until loaded
+                raise UpdateFailed(
+                    f"GTFS data not loaded yet: {self._load_error}"
+                    if self._load_error
+                    else "GTFS data not loaded yet"
+                )
+
+            self._updated_at = current_time
+
+            for connection in self._connections:
+                self._drop_departed(connection, current_time)
+
+            return self.data
+
+        self._restored = False
+        self._updated_at = current_time
+
         for connection in self._connections:
             departures: Departures = await self._api.departures(
                 connection, current_time.strftime("%Y%m%d")
             )
 
+            # departures are cached per day, stop version and feed generation, the same
+            # list is received until one of them changes or the entry is evicted
+            self._set_timeline(connection, departures.times)
+
             self.data[connection.uid].update(
                 {
                     "stop_id": departures.stop_id,
@@ -73,6 +340,106 @@ class VgnUpdateCoordinator(DataUpdateCoordinator):
                 }
             )
 
+        if self._destination:
+            journey = await self._api.journey(
+                self._stop, self._destination, current_time
+            )
+
+            self.data[self.journey_uid].update({"journey": journey})
+
+        if (
+            self._snapshot_generation != self._api.generation
+            or self._snapshot_until
+            < current_time + timedelta(hours=SNAPSHOT_MIN_HORIZON)
+        ):
+            await self._async_save_snapshot(current_time)
+
         _LOGGER.debug("Update data finished")
 
         return self.data
+
+    def _drop_departed(self, connection: Connection, current_time: datetime) -> None:
+        """Remove departures before current time."""
+        data = self.data[connection.uid]
+
+        if data.get("times"):
+            data["times"] = [x for x in data["times"] if x >= current_time]
+
+    async def _async_restore_snapshot(self) -> None:
+        """Serve departures of the stored snapshot if it matches the feed files."""
+        if not (snapshot := await self._store.async_load()):
+            return
+
+        try:
+            generation = await self._api.feed_generation()
+        except GtfsFileNotFound:
+            return
+
+        if snapshot["generation"] != generation:
+            _LOGGER.debug("Snapshot of '%s' is outdated, ignore it", self.title)
+            return
+
+        current_time = dt_util.now().replace(second=0, microsecond=0)
+
+        for connection in self._connections:
+            if not (entry := snapshot["departures"].get(connection.uid)):
+                continue
+
+            times = [datetime.fromtimestamp(x, TIMEZONE) for x in entry["times"]]
+
+            self._set_timeline(connection, times)
+            self.data[connection.uid].update(
+                {"stop_id": entry["stop_id"], "times": times}
+            )
+            self._drop_departed(connection, current_time)
+
+        # renew snapshot with first live update if connections were added meanwhile
+        if all(x.uid in snapshot["departures"] for x in self._connections):
+            self._snapshot_generation = generation
+
+        self._snapshot_until = datetime.fromtimestamp(snapshot["until"], TIMEZONE)
+        self._updated_at = current_time
+        self._restored = True
+
+        _LOGGER.debug("Serve departures of '%s' from snapshot", self.title)
+
+        self.async_set_updated_data(self.data)
+
+    async def _async_save_snapshot(self, current_time: datetime) -> None:
+        """Store departures of the next hours, stamped with the feed generation."""
+        until = current_time + timedelta(hours=SNAPSHOT_HORIZON)
+        dates = [
+            (current_time + timedelta(days=x)).strftime("%Y%m%d")
+            for x in range((until.date() - current_time.date()).days + 1)
+        ]
+
+        departures = {}
+
+        for connection in self._connections:
+            times = []
+
+            for date in dates:
+                result: Departures = await self._api.departures(connection, date)
+                times.extend(
+                    int(x.timestamp())
+                    for x in result.times
+                    if current_time <= x <= until
+                )
+
+            departures[connection.uid] = {
+                "stop_id": connection.stop_id,
+                "times": sorted(set(times)),
+            }
+
+        await self._store.async_save(
+            {
+                "generation": self._api.generation,
+                "until": int(until.timestamp()),
+                "departures": departures,
+            }
+        )
+
+        self._snapshot_generation = self._api.generation
+        self._snapshot_until = until
+
+        _LOGGER.debug("Saved snapshot of '%s' until %s", self.title, until)
@@ -0,0 +1,122 @@
+"""On-demand profiling of the VGN Departures GTFS engine."""
+
+from collections import Counter
+import cProfile
+import logging
+import os
+from pathlib import Path
+import sys
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_METHOD_SAMPLING = "sampling"
+PROFILE_METHOD_CPROFILE = "cprofile"
+
+# stacks are only recorded if they contain a frame of this integration
+PACKAGE_DIRECTORY = str(Path(__file__).resolve().parent)
+
+
+class StackSampler:
+    """Samples stacks of all threads running integration code.
+
+    Stacks are collected in folded format ("frame;frame;frame count") which can be
+    rendered by flamegraph.pl, speedscope or inferno. The sampler thread only exists
+    while a capture is running.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """Initialize sampler with sampling interval in seconds."""
+        self._interval = interval
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="vgn_departures_profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        """Stop sampling and return collected stacks with their number of samples."""
+        self._stop.set()
+        self._thread.join()
+
+        return self._stacks
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+
+        while not self._stop.wait(self._interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                relevant = False
+
+                while frame is not None:
+                    code = frame.f_code
+                    relevant = relevant or code.co_filename.startswith(
+                        PACKAGE_DIRECTORY
+                    )
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+
+                if relevant:
+                    self._stacks[";".join(reversed(stack))] += 1
+
+
+class Profiler:
+    """Profile capture started by the profile service, only one capture at a time."""
+
+    def __init__(self, method: str, path: str) -> None:
+        """Initialize profiler writing its result to path."""
+        self._method = method
+        self._path = path
+        self._sampler: StackSampler | None = None
+        self._profile: cProfile.Profile | None = None
+        self._stacks: Counter[str] = Counter()
+
+    @property
+    def path(self) -> str:
+        """Return path of the profile file."""
+        return self._path
+
+    def start(self) -> None:
+        """Start capture.
+
+        cProfile is enabled for the calling (event loop) thread and records every
+        callback running on it, not only those of this integration.
+        """
+        _LOGGER.debug("Start %s profiling", self._method)
+
+        if self._method == PROFILE_METHOD_CPROFILE:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = StackSampler()
+            self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop cProfile capture, must be called from the thread which started it."""
+        if self._profile:
+            self._profile.disable()
+
+        _LOGGER.debug("Stopped %s profiling", self._method)
+
+    def write(self) -> None:
+        """Stop sampling and write profile file (blocking)."""
+        if self._sampler:
+            self._stacks = self._sampler.stop()
+
+        if self._profile:
+            self._profile.dump_stats(self._path)
+        if self._sampler:
+            with open(self._path, "w", encoding="utf-8") as file:
+                file.writelines(
+                    f"{stack} {count}\n" for stack, count in self._stacks.items()
+                )
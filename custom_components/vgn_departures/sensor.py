@@ -1,24 +1,50 @@
 """VGN Departures sensor integration."""
 
+from collections.abc import Callable
+from dataclasses import dataclass
 import logging
+import math
 
 from homeassistant import config_entries, core
-from homeassistant.components.sensor import SensorEntity, datetime
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+    datetime,
+)
+from homeassistant.const import UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
+    ATTR_ARRIVAL_TIME,
     ATTR_ATTRIBUTION,
+    ATTR_DEPARTURES,
+    ATTR_DESTINATION,
     ATTR_DIRECTION,
     ATTR_DIRECTION_TEXT,
+    ATTR_LEGS,
     ATTR_LINE_NAME,
     ATTR_OCCUPANCY_LEVEL,
+    ATTR_ORIGIN,
     ATTR_PLANNED_DEPARTURE_TIME,
     ATTR_STOP_ID,
+    ATTR_TRANSFERS,
     ATTR_TRANSPORT_TYPE,
+    MAX_DEPARTURES,
+    STATISTIC_HEADWAY,
+    STATISTIC_LAST_DEPARTURE_TODAY,
+    STATISTIC_MINUTES_UNTIL_DEPARTURE,
+    STATISTIC_REMAINING_TODAY,
+)
+from .coordinator import (
+    VgnUpdateCoordinator,
+    get_departure_board_uid,
+    get_statistic_uid,
 )
-from .coordinator import VgnUpdateCoordinator
-from .vgn.data_classes import Connection, TransportType
+from .vgn.data_classes import Connection, Journey, TransportType
+from .vgn.statistics import DepartureStatistics
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,22 +56,128 @@ async def async_setup_entry(
 
     coordinator: VgnUpdateCoordinator = entry.runtime_data
 
-    await coordinator.async_config_entry_first_refresh()
+    # entities start unavailable, GTFS data is loaded in background (see async_warm_up)
+    entities: list[SensorEntity] = [
+        VgnSensorEntity(hass, coordinator, entry_data)
+        for entry_data in coordinator.connections
+    ]
 
-    async_add_entities(
-        [
-            VgnSensorEntity(hass, coordinator, entry_data)
-            for entry_data in coordinator.connections
-        ],
-        update_before_add=True,
-    )
+    # statistics are disabled by default, they are enabled per entity if needed
+    entities += [
+        VgnStatisticSensorEntity(coordinator, connection, description)
+        for connection in coordinator.connections
+        for description in STATISTIC_SENSORS
+    ]
 
+    if coordinator.destination:
+        entities.append(VgnJourneySensorEntity(hass, coordinator))
 
-class VgnSensorEntity(CoordinatorEntity, SensorEntity):
-    """VGN Sensor provides information about next departure(s)."""
+    if coordinator.departure_board:
+        entities.append(VgnDepartureBoardEntity(hass, coordinator))
+
+    async_add_entities(entities)
+
+
+@dataclass(frozen=True, kw_only=True)
+class VgnStatisticSensorEntityDescription(SensorEntityDescription):
+    """Description of a statistic sensor of a connection."""
+
+    name_suffix: str
+    value_fn: Callable[[DepartureStatistics, datetime], float | int | datetime | None]
+
+
+def _minutes_until(statistics: DepartureStatistics, now: datetime) -> int | None:
+    """Return whole minutes until next departure."""
+    if statistics.next_departure is None:
+        return None
+
+    return max(math.floor((statistics.next_departure - now).total_seconds() / 60), 0)
+
+
+STATISTIC_SENSORS: tuple[VgnStatisticSensorEntityDescription, ...] = (
+    VgnStatisticSensorEntityDescription(
+        key=STATISTIC_MINUTES_UNTIL_DEPARTURE,
+        name_suffix="Minutes until departure",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        entity_registry_enabled_default=False,
+        value_fn=_minutes_until,
+    ),
+    VgnStatisticSensorEntityDescription(
+        key=STATISTIC_HEADWAY,
+        name_suffix="Headway next hour",
+        icon="mdi:timer-sync-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_registry_enabled_default=False,
+        value_fn=lambda statistics, now: statistics.headway,
+    ),
+    VgnStatisticSensorEntityDescription(
+        key=STATISTIC_REMAINING_TODAY,
+        name_suffix="Departures remaining today",
+        icon="mdi:counter",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_registry_enabled_default=False,
+        value_fn=lambda statistics, now: statistics.remaining_today,
+    ),
+    VgnStatisticSensorEntityDescription(
+        key=STATISTIC_LAST_DEPARTURE_TODAY,
+        name_suffix="Last departure today",
+        icon="mdi:bus-stop-uncovered",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        entity_registry_enabled_default=False,
+        value_fn=lambda statistics, now: statistics.last_departure_today,
+    ),
+)
+
+
+class VgnEntity(CoordinatorEntity, SensorEntity):
+    """Base class of VGN entities, state is only written when it has changed."""
 
     _attr_attribution = ATTR_ATTRIBUTION
 
+    def __init__(self, coordinator: VgnUpdateCoordinator) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+
+        self._coordinator: VgnUpdateCoordinator = coordinator
+        # availability, value and attributes of the last written state
+        self._written_state: tuple | None = None
+
+    @property
+    def available(self) -> bool:
+        """Return whether GTFS data is loaded and the entity has valid data."""
+        return super().available and self._coordinator.is_ready
+
+    @callback
+    def _async_write_state_if_changed(self, *state) -> None:
+        """Write state only if availability or provided state differs from the last write."""
+        current = (self.available, *state)
+
+        if current == self._written_state:
+            return
+
+        self._written_state = current
+        self.async_write_ha_state()
+
+
+class VgnSensorEntity(VgnEntity):
+    """VGN Sensor provides information about next departure(s)."""
+
+    # static attributes are not stored by the recorder on every state change
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_STOP_ID,
+            ATTR_LINE_NAME,
+            ATTR_TRANSPORT_TYPE,
+            ATTR_DIRECTION,
+            ATTR_DIRECTION_TEXT,
+        }
+    )
+
     def __init__(
         self,
         hass: HomeAssistant,
@@ -56,7 +188,6 @@ class VgnSensorEntity(CoordinatorEntity, SensorEntity):
         super().__init__(coordinator)
 
         self._hass: HomeAssistant = hass
-        self._coordinator: VgnUpdateCoordinator = coordinator
         self._uid: str = connection.uid
         self._line: str = connection.line_name
         self._direction: int = connection.direction_id
@@ -130,4 +261,165 @@ class VgnSensorEntity(CoordinatorEntity, SensorEntity):
         if data and data["times"]:
             self._value = data["times"][0]
 
-        self.async_write_ha_state()
+        self._async_write_state_if_changed(self._value)
+
+
+class VgnJourneySensorEntity(VgnEntity):
+    """VGN Sensor provides the next journey from entry stop to a destination stop."""
+
+    _attr_icon = "mdi:map-marker-path"
+    _unrecorded_attributes = frozenset({ATTR_ORIGIN, ATTR_DESTINATION, ATTR_LEGS})
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: VgnUpdateCoordinator,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+
+        self._hass: HomeAssistant = hass
+        self._uid: str = coordinator.journey_uid
+        self._value = None
+
+        self._attr_name = (
+            f"{coordinator.title} - Journey - {coordinator.destination.name}"
+        )
+        self._attr_unique_id = self._uid
+        self._attr_should_poll = False
+
+        self._attr_extra_state_attributes = {
+            ATTR_ORIGIN: coordinator.stop.name,
+            ATTR_DESTINATION: coordinator.destination.name,
+            ATTR_ARRIVAL_TIME: None,
+            ATTR_TRANSFERS: None,
+            ATTR_LEGS: [],
+        }
+
+        _LOGGER.debug("VGN journey entity created - Unique id: %s", self._uid)
+
+    @property
+    def native_value(self):
+        """Returns departure time of the next journey."""
+        return self._value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+
+        _LOGGER.debug("Updating VGN journey sensor: %s", self._attr_name)
+
+        journey: Journey | None = self._coordinator.data[self._uid].get("journey")
+
+        self._value = journey.departure if journey else None
+
+        self._attr_extra_state_attributes.update(
+            {
+                ATTR_ARRIVAL_TIME: journey.arrival if journey else None,
+                ATTR_TRANSFERS: journey.transfers if journey else None,
+                ATTR_LEGS: [x.to_dict() for x in journey.legs] if journey else [],
+            }
+        )
+
+        self._async_write_state_if_changed(
+            self._value, self._attr_extra_state_attributes[ATTR_LEGS]
+        )
+
+
+class VgnDepartureBoardEntity(VgnEntity):
+    """VGN Sensor provides next departures over all connections of a config entry."""
+
+    _attr_icon = "mdi:bus-clock"
+    _unrecorded_attributes = frozenset({ATTR_DEPARTURES})
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: VgnUpdateCoordinator,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+
+        self._hass: HomeAssistant = hass
+        self._uid: str = get_departure_board_uid(coordinator.stop)
+        self._value = None
+
+        self._attr_name = f"{coordinator.title} - Departures"
+        self._attr_unique_id = self._uid
+        self._attr_should_poll = False
+
+        self._attr_extra_state_attributes = {
+            ATTR_DEPARTURES: [],
+        }
+
+        _LOGGER.debug("VGN departure board created - Unique id: %s", self._uid)
+
+    @property
+    def native_value(self):
+        """Returns time of the next departure at the stop."""
+        return self._value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+
+        _LOGGER.debug("Updating VGN departure board: %s", self._attr_name)
+
+        departures = self._coordinator.next_departures(MAX_DEPARTURES)
+
+        self._value = departures[0][0] if departures else None
+
+        # compact form: "HH:MM" instead of full timestamps, transport is part of the line
+        self._attr_extra_state_attributes[ATTR_DEPARTURES] = [
+            {
+                ATTR_LINE_NAME: f"{connection.transport} {connection.line_name}",
+                ATTR_DIRECTION_TEXT: connection.name,
+                ATTR_PLANNED_DEPARTURE_TIME: time.strftime("%H:%M"),
+            }
+            for time, connection in departures
+        ]
+
+        self._async_write_state_if_changed(
+            self._value, self._attr_extra_state_attributes[ATTR_DEPARTURES]
+        )
+
+
+class VgnStatisticSensorEntity(VgnEntity):
+    """VGN Sensor provides a service statistic of a connection."""
+
+    entity_description: VgnStatisticSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: VgnUpdateCoordinator,
+        connection: Connection,
+        description: VgnStatisticSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+
+        self.entity_description = description
+        self._connection: Connection = connection
+        self._value = None
+
+        self._attr_name = f"{coordinator.title} - {connection.transport} {connection.line_name} - {connection.name} - {description.name_suffix}"
+        self._attr_unique_id = get_statistic_uid(connection.uid, description.key)
+        self._attr_should_poll = False
+
+    @property
+    def native_value(self):
+        """Returns value of the statistic."""
+        return self._value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        statistics = self._coordinator.statistics(self._connection)
+
+        self._value = (
+            self.entity_description.value_fn(statistics, self._coordinator.updated_at)
+            if statistics
+            else None
+        )
+
+        self._async_write_state_if_changed(self._value)
@@ -0,0 +1,158 @@
+"""Services of the VGN Departures integration."""
+
+from datetime import timedelta
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components import persistent_notification
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_DEPARTURES,
+    ATTR_END,
+    ATTR_METHOD,
+    ATTR_SECONDS,
+    ATTR_START,
+    ATTR_STOP,
+    DATA_PROFILER,
+    DOMAIN,
+    MAX_QUERY_DAYS,
+    SERVICE_GET_DEPARTURES,
+    SERVICE_PROFILE,
+)
+from .coordinator import get_api, get_departure_dict, get_entity_connection
+from .profiler import PROFILE_METHOD_CPROFILE, PROFILE_METHOD_SAMPLING, Profiler
+from .vgn.exceptions import GtfsFileNotFound
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SECONDS, default=60): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=3600)
+        ),
+        vol.Optional(ATTR_METHOD, default=PROFILE_METHOD_SAMPLING): vol.In(
+            [PROFILE_METHOD_SAMPLING, PROFILE_METHOD_CPROFILE]
+        ),
+    }
+)
+
+SERVICE_GET_DEPARTURES_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(ATTR_ENTITY_ID, "target"): cv.entity_id,
+            vol.Exclusive(ATTR_STOP, "target"): cv.string,
+            vol.Optional(ATTR_START): cv.datetime,
+            vol.Optional(ATTR_END): cv.datetime,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ENTITY_ID, ATTR_STOP),
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register services of the integration."""
+
+    async def _async_profile(call: ServiceCall) -> None:
+        """Capture a profile of the GTFS engine for the requested time."""
+        domain_data = hass.data.setdefault(DOMAIN, {})
+
+        if domain_data.get(DATA_PROFILER):
+            raise HomeAssistantError("Profiling is already running")
+
+        method = call.data[ATTR_METHOD]
+        extension = "prof" if method == PROFILE_METHOD_CPROFILE else "folded"
+        timestamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+
+        profiler = Profiler(
+            method, hass.config.path(f"{DOMAIN}_profile_{timestamp}.{extension}")
+        )
+        profiler.start()
+
+        domain_data[DATA_PROFILER] = profiler
+
+        async def _async_stop(_now) -> None:
+            # joining the sampler thread is left to write() in the executor
+            profiler.stop()
+            domain_data.pop(DATA_PROFILER, None)
+
+            await hass.async_add_executor_job(profiler.write)
+
+            _LOGGER.info("Profile written to %s", profiler.path)
+
+            persistent_notification.async_create(
+                hass,
+                f"Profile written to `{profiler.path}`",
+                title="VGN Departures",
+                notification_id=f"{DOMAIN}_profile",
+            )
+
+        async_call_later(hass, call.data[ATTR_SECONDS], _async_stop)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, _async_profile, schema=SERVICE_PROFILE_SCHEMA
+    )
+
+    async def _async_get_departures(call: ServiceCall) -> ServiceResponse:
+        """Return departures of a connection or all connections of a stop in a time range."""
+        start = dt_util.as_local(call.data.get(ATTR_START) or dt_util.now())
+        end = (
+            dt_util.as_local(call.data[ATTR_END])
+            if ATTR_END in call.data
+            else start + timedelta(days=1)
+        )
+
+        if end < start:
+            raise HomeAssistantError("End of the range is before its start")
+        if end - start > timedelta(days=MAX_QUERY_DAYS):
+            raise HomeAssistantError(
+                f"Range is limited to {MAX_QUERY_DAYS} days, reduce the range"
+            )
+
+        api = get_api(hass)
+
+        try:
+            await api.ensure_loaded()
+        except GtfsFileNotFound as err:
+            raise HomeAssistantError("GTFS data could not be loaded") from err
+
+        if ATTR_ENTITY_ID in call.data:
+            connections = [get_entity_connection(hass, call.data[ATTR_ENTITY_ID])]
+        else:
+            stop = next(
+                (x for x in await api.stops() if x.name == call.data[ATTR_STOP]), None
+            )
+
+            if stop is None:
+                raise HomeAssistantError(f'Stop "{call.data[ATTR_STOP]}" not found')
+
+            connections = await api.connections(stop)
+
+        departures = await api.departures_between(connections, start, end)
+
+        return {
+            ATTR_DEPARTURES: [
+                get_departure_dict(time, connection) for time, connection in departures
+            ]
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_DEPARTURES,
+        _async_get_departures,
+        schema=SERVICE_GET_DEPARTURES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -1,6 +1,8 @@
 """API class to manage GTFS data."""
 
 import asyncio
+import datetime as dt
+import hashlib
 import logging
 from pathlib import Path
 import re
@@ -14,13 +16,111 @@ import aioshutil
 from async_lru import alru_cache
 import polars as pl
 
-from .data_classes import Connection, Departures, Stop
+from .data_classes import (
+    Connection,
+    Departures,
+    Journey,
+    JourneyLeg,
+    Stop,
+    TransportType,
+)
 from .exceptions import GtfsFileNotFound
-from .helpers import datestr_to_date, weekday_to_str
+from .helpers import (
+    TIMEZONE,
+    datestr_to_date,
+    location_type_expr,
+    seconds_expr,
+    seconds_to_datetime,
+    weekday_to_str,
+)
+from .journey import JourneyPlanner
+from .spatial_index import DEFAULT_RADIUS, SpatialIndex
+from .stop_index import (
+    LOCATION_TYPE_STOP,
+    StationIndex,
+    StopIndex,
+    changed_keys,
+    changed_trips,
+    stops_of_trips,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-GTFS_LOCATION: Final = f"{Path(__file__).resolve().parent}/data/GTFS.zip"
+GTFS_DIRECTORY: Final = f"{Path(__file__).resolve().parent}/data"
+GTFS_LOCATION: Final = f"{GTFS_DIRECTORY}/GTFS.zip"
+
+# id columns of GTFS tables, ids of additional feeds are prefixed with the feed name
+GTFS_ID_COLUMNS: Final = {
+    "agency.txt": ("agency_id",),
+    "stops.txt": ("stop_id", "parent_station"),
+    "routes.txt": ("route_id", "agency_id"),
+    "trips.txt": ("route_id", "service_id", "trip_id"),
+    "stop_times.txt": ("trip_id", "stop_id"),
+    "calendar.txt": ("service_id",),
+    "calendar_dates.txt": ("service_id",),
+    "transfers.txt": (
+        "from_stop_id",
+        "to_stop_id",
+        "from_route_id",
+        "to_route_id",
+        "from_trip_id",
+        "to_trip_id",
+    ),
+    "frequencies.txt": ("trip_id",),
+}
+# repeating string columns stored as categoricals sharing one global string dictionary
+GTFS_CATEGORICAL_COLUMNS: Final = ("trip_headsign", "route_short_name")
+# GTFS time columns (HH:MM:SS) stored as seconds after midnight
+GTFS_TIME_COLUMNS: Final = ("arrival_time", "departure_time", "start_time", "end_time")
+
+
+def feed_namespace(path: str) -> str:
+    """Return id prefix of a GTFS feed, the primary feed GTFS.zip is not namespaced."""
+    if Path(path).name == Path(GTFS_LOCATION).name:
+        return ""
+
+    return f"{Path(path).stem}:"
+
+
+def read_table(path: str, namespace: str = "") -> pl.DataFrame:
+    """Read GTFS table into compact columnar form with namespaced ids."""
+    table = Path(path).name
+    columns = pl.read_csv(path, n_rows=0).columns
+    id_columns = [x for x in GTFS_ID_COLUMNS.get(table, ()) if x in columns]
+
+    df = pl.read_csv(path, schema_overrides={x: pl.Utf8 for x in id_columns})
+
+    if namespace:
+        df = df.with_columns(
+            pl.when(pl.col(x).is_not_null())
+            .then(pl.lit(namespace) + pl.col(x))
+            .alias(x)
+            for x in id_columns
+        )
+
+    return df.with_columns(
+        *(pl.col(x).cast(pl.Categorical) for x in id_columns),
+        *(
+            pl.col(x).cast(pl.Utf8).cast(pl.Categorical)
+            for x in GTFS_CATEGORICAL_COLUMNS
+            if x in columns
+        ),
+        *(seconds_expr(x).alias(x) for x in GTFS_TIME_COLUMNS if x in columns),
+    )
+
+
+def trip_starts(
+    stop_times: pl.DataFrame, frequencies: pl.DataFrame | None
+) -> pl.DataFrame | None:
+    """Return first departure of every frequency based trip template."""
+    if frequencies is None:
+        return None
+
+    return (
+        stop_times.filter(pl.col("trip_id").is_in(frequencies.get_column("trip_id")))
+        .group_by("trip_id")
+        .agg(pl.col("departure_time").min().alias("first_departure"))
+    )
 
 
 class ApiGtfs:
@@ -28,99 +128,300 @@ class ApiGtfs:
 
     def __init__(self) -> None:
         """Initialize API."""
+        # ids and names of all feeds share one string dictionary
+        pl.enable_string_cache()
+
         self._agency: pl.DataFrame | None
         self._calendar: pl.DataFrame | None
         self._calendar_dates: pl.DataFrame | None
         self._routes: pl.DataFrame | None
         self._stops: pl.DataFrame | None
-        self._stop_times: pl.DataFrame | None
-        self._transfers: pl.DataFrame | None
+        self._stop_index: StopIndex | None = None
+        self._spatial_index: SpatialIndex | None = None
+        self._station_index: StationIndex | None = None
+        self._transfers: pl.DataFrame | None = None
+        self._frequencies: pl.DataFrame | None = None
+        self._trip_starts: pl.DataFrame | None = None
         self._trips: pl.DataFrame | None
+        self._generation: str | None = None
+        self._loaded: bool = False
+        self._load_lock = asyncio.Lock()
+        self._planner: JourneyPlanner | None = None
+        self._planner_lock = asyncio.Lock()
+        # connections of the loaded feed generation by their stop index row
+        self._connection_rows: dict[tuple, Connection] = {}
 
     async def load(self) -> None:
-        """Extract GTFS zip file and load data contains in txt files."""
+        """Extract GTFS zip files and load data contains in txt files.
+
+        Besides the primary GTFS.zip every other zip file in the data directory is loaded
+        as additional feed. Tables of all feeds are merged, ids of additional feeds are
+        namespaced with the feed name.
+        """
         _LOGGER.debug("Loading GTFS data files")
 
+        feeds = await self._feeds()
+        tables = await self._read_feeds(feeds)
+
+        await asyncio.get_running_loop().run_in_executor(None, self._set_tables, tables)
+
+        self._generation = await self._feed_generation(feeds)
+        self._planner = None
+        self._loaded = True
+
+        _LOGGER.debug("GTFS data files loaded")
+
+    async def update(self) -> bool:
+        """Apply a new version of the GTFS feeds if available.
+
+        New tables are compared with the loaded generation by key. Only stop slices
+        served by changed trips are rebuilt, cached results of other stops stay valid.
+        Return whether the feed has changed.
+        """
+        async with self._load_lock:
+            if not self._loaded:
+                await self.load()
+                return True
+
+            feeds = await self._feeds()
+            generation = await self._feed_generation(feeds)
+
+            if generation == self._generation:
+                return False
+
+            _LOGGER.debug("Updating GTFS data to generation %s", generation)
+
+            tables = await self._read_feeds(feeds)
+
+            (
+                stop_ids,
+                slices,
+                starts,
+                stops_changed,
+                trips_changed,
+            ) = await asyncio.get_running_loop().run_in_executor(
+                None, self._diff_tables, tables
+            )
+
+            self._assign_tables(tables)
+            self._trip_starts = starts
+            self._stop_index.replace(stop_ids, slices)
+
+            if self._stop_index.needs_compaction:
+                self._stop_index = await asyncio.get_running_loop().run_in_executor(
+                    None, self._stop_index.compacted
+                )
+
+            if stops_changed:
+                self.stops.cache_clear()
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._set_stop_indices, self._stops
+                )
+
+            if trips_changed:
+                self._planner = None
+                self._connection_rows = {}
+
+            self._generation = generation
+
+        _LOGGER.debug("GTFS data updated, %s stop(s) affected", len(stop_ids))
+
+        return True
+
+    @property
+    def loaded(self) -> bool:
+        """Return whether GTFS data files are loaded."""
+        return self._loaded
+
+    @property
+    def generation(self) -> str | None:
+        """Return identifier of the loaded feed generation."""
+        return self._generation
+
+    async def feed_generation(self) -> str:
+        """Return identifier of the feed files on disk without loading them."""
+        return await self._feed_generation(await self._feeds())
+
+    async def ensure_loaded(self) -> None:
+        """Load GTFS data files once, concurrent callers wait for the same load."""
+        async with self._load_lock:
+            if not self._loaded:
+                await self.load()
+
+    async def _feeds(self) -> list[str]:
+        """Return paths of all feeds, primary feed first."""
         path = AsyncPath(GTFS_LOCATION)
 
         if not await path.exists():
             raise GtfsFileNotFound(f'GTFS zip file path "{path}" does not exist')
 
-        async with aiofiles.tempfile.TemporaryDirectory() as tmp_dir:
-            await aioshutil.unpack_archive(str(path), tmp_dir, format="zip")
-
-            for file in await aiofiles.os.listdir(tmp_dir):
-                file_path = f"{tmp_dir}/{file}"
-
-                _LOGGER.debug("Reading file %s", file_path)
-
-                match file:
-                    case "stops.txt":
-                        self._stops = await self._read_df(file_path)
-                    case "agency.txt":
-                        self._agency = await self._read_df(file_path)
-                    case "transfers.txt":
-                        self._transfers = await self._read_df(file_path)
-                    case "calendar.txt":
-                        self._calendar = await self._read_df(file_path)
-                    case "calendar_dates.txt":
-                        self._calendar_dates = await self._read_df(file_path)
-                    case "stop_times.txt":
-                        self._stop_times = await self._read_df(file_path)
-                    case "trips.txt":
-                        self._trips = await self._read_df(file_path)
-                    case "routes.txt":
-                        self._routes = await self._read_df(file_path)
-                    case _:
-                        _LOGGER.warning("Ignore unknown file %s", file_path)
+        return [str(path)] + sorted(
+            [
+                str(x)
+                async for x in AsyncPath(GTFS_DIRECTORY).glob("*.zip")
+                if x.name != path.name
+            ]
+        )
 
-        _LOGGER.debug("GTFS data files loaded")
+    async def _feed_generation(self, feeds: list[str]) -> str:
+        """Return identifier of feed files based on their names, sizes and modification times."""
+        digest = hashlib.sha1()
 
-    @alru_cache
-    async def stops(
-        self, name: str | None = None, incl_parents: bool = False
-    ) -> list[Stop]:
-        """Return stops found in GTFS contain provided name(case insensitive)."""
-        stops = self._stops.clone()
+        for feed in feeds:
+            stat = await AsyncPath(feed).stat()
+            digest.update(f"{feed}:{stat.st_size}:{stat.st_mtime_ns};".encode())
 
-        _LOGGER.debug("Get stops for name: %s", name)
+        return digest.hexdigest()
 
-        df = None
+    async def _read_feeds(self, feeds: list[str]) -> dict[str, pl.DataFrame]:
+        """Read tables of all feeds and merge them by table."""
+        tables: dict[str, list[pl.DataFrame]] = {}
 
-        df_filters = []
+        for feed in feeds:
+            _LOGGER.debug("Reading feed %s", feed)
 
-        if not incl_parents:
-            expr_parents = ~pl.col("location_type").str.contains("1")
-            df_filters.append(expr_parents)
+            async with aiofiles.tempfile.TemporaryDirectory() as tmp_dir:
+                await aioshutil.unpack_archive(feed, tmp_dir, format="zip")
+
+                for file in await aiofiles.os.listdir(tmp_dir):
+                    file_path = f"{tmp_dir}/{file}"
+
+                    if file not in GTFS_ID_COLUMNS:
+                        _LOGGER.warning("Ignore unknown file %s", file_path)
+                        continue
+
+                    _LOGGER.debug("Reading file %s", file_path)
+
+                    tables.setdefault(file, []).append(
+                        await self._read_df(file_path, feed_namespace(feed))
+                    )
+
+        return {
+            file: pl.concat(frames, how="diagonal_relaxed")
+            for file, frames in tables.items()
+        }
+
+    def _tables(self) -> dict[str, pl.DataFrame]:
+        """Return currently loaded tables."""
+        return {
+            "stops.txt": self._stops,
+            "agency.txt": self._agency,
+            "transfers.txt": self._transfers,
+            "calendar.txt": self._calendar,
+            "calendar_dates.txt": self._calendar_dates,
+            "stop_times.txt": self._stop_index.frame(),
+            "trips.txt": self._trips,
+            "routes.txt": self._routes,
+            "frequencies.txt": self._frequencies,
+        }
+
+    def _assign_tables(self, tables: dict[str, pl.DataFrame]) -> None:
+        """Assign all tables except stop_times, which are kept in the stop index."""
+        self._stops = tables.get("stops.txt")
+        self._agency = tables.get("agency.txt")
+        self._transfers = tables.get("transfers.txt")
+        self._calendar = tables.get("calendar.txt")
+        self._calendar_dates = tables.get("calendar_dates.txt")
+        self._trips = tables.get("trips.txt")
+        self._routes = tables.get("routes.txt")
+        self._frequencies = tables.get("frequencies.txt")
+
+    def _set_tables(self, tables: dict[str, pl.DataFrame]) -> None:
+        """Assign tables and build stop index (blocking)."""
+        self._assign_tables(tables)
+        self._trip_starts = trip_starts(
+            tables["stop_times.txt"], tables.get("frequencies.txt")
+        )
+        self._stop_index = StopIndex(tables["stop_times.txt"])
+        self._set_stop_indices(tables["stops.txt"])
 
-        if name:
-            expr_name = pl.col("stop_name").str.contains(f"(?i){name}")
-            df_filters.append(expr_name)
+    def _set_stop_indices(self, stops: pl.DataFrame) -> None:
+        """Build station and spatial index of stops (blocking).
 
-        df = stops.filter(*df_filters)
+        Stations are represented by their stops in the spatial index.
+        """
+        self._station_index = StationIndex(stops)
+        self._spatial_index = SpatialIndex(
+            stops.filter(location_type_expr(stops) == LOCATION_TYPE_STOP)
+        )
 
-        groups = df.group_by(pl.col("stop_name"))
+    def _diff_tables(self, tables: dict[str, pl.DataFrame]):
+        """Compare new tables with loaded ones and prepare slices of changed stops (blocking)."""
+        old = self._tables()
 
-        stops = []
+        trips = changed_trips(old, tables)
+        stop_ids = stops_of_trips(old["stop_times.txt"], trips) | stops_of_trips(
+            tables["stop_times.txt"], trips
+        )
 
-        for n, data in groups:
-            stop = Stop(n[0], data["stop_id"].to_list())
+        stops_changed = bool(
+            changed_keys(old["stops.txt"], tables.get("stops.txt"), "stop_id")
+        )
+        transfers_changed = bool(
+            changed_keys(
+                old["transfers.txt"], tables.get("transfers.txt"), "from_stop_id"
+            )
+        )
 
-            stops.append(stop)
+        _LOGGER.debug(
+            "Feed diff: %s changed trip(s), %s affected stop(s)",
+            len(trips),
+            len(stop_ids),
+        )
 
-        return sorted(stops, key=lambda x: x.name)
+        return (
+            stop_ids,
+            StopIndex.partition(tables["stop_times.txt"], stop_ids),
+            trip_starts(tables["stop_times.txt"], tables.get("frequencies.txt")),
+            stops_changed,
+            bool(trips) or stops_changed or transfers_changed,
+        )
 
     @alru_cache
-    async def connections(self, stop: Stop) -> list[Connection]:
-        """Return connections for privided stop object."""
-        connections = []
+    async def stops(
+        self, name: str | None = None, incl_parents: bool = False
+    ) -> list[Stop]:
+        """Return stops found in GTFS contain provided name(case insensitive).
 
-        for stop_id in stop.ids:
-            connections += await self._connections(stop_id)
+        Stops of a station are returned as one stop named after the station.
+        """
+        _LOGGER.debug("Get stops for name: %s", name)
 
-        return connections
+        return self._station_index.stops(name, incl_parents)
+
+    async def stops_near(
+        self, latitude: float, longitude: float, radius: float = DEFAULT_RADIUS
+    ) -> list[Stop]:
+        """Return stops within radius metres of a coordinate, closest first.
+
+        Platforms inside the radius are resolved to their station, so names and ids
+        are the same as of stops().
+        """
+        stops = self._station_index.stops_of(
+            [
+                stop_id
+                for _, stop_id, _ in self._spatial_index.near(
+                    latitude, longitude, radius
+                )
+            ]
+        )
+
+        _LOGGER.debug(
+            "Found %s stop(s) within %sm of %s,%s",
+            len(stops),
+            radius,
+            latitude,
+            longitude,
+        )
+
+        return stops
+
+    async def connections(self, stop: Stop) -> list[Connection]:
+        """Return connections for privided stop object, all stop ids are answered at once."""
+        return await self._connections(
+            stop.ids, tuple(self._stop_index.version(x) for x in stop.ids)
+        )
 
-    @alru_cache
     async def departures(self, connection: Connection, date: str) -> Departures:
         """Return all departiures for provided connection and date."""
         if not connection:
@@ -128,18 +429,27 @@ class ApiGtfs:
         if not date or not re.fullmatch(r"\d{8}", date):
             raise ValueError("No date provided or invalid formate used")
 
+        return await self._departures(
+            connection, date, self._stop_index.version(connection.stop_id)
+        )
+
+    @alru_cache(maxsize=1024)
+    async def _departures(
+        self, connection: Connection, date: str, version: int
+    ) -> Departures:
+        """Return departures for provided connection and date, version of the stop is part of the cache key."""
         _LOGGER.debug(
             'Searching departures for connection "%s" on "%s"', connection.name, date
         )
 
         routes = self._routes.clone()
-        stop_times: pl.DataFrame = self._stop_times.clone()
+        stop_times: pl.DataFrame = self._stop_index.stop_times(connection.stop_id)
         trips: pl.DataFrame = self._trips.clone()
 
         s_active_trips = await self._active_trips(date)
 
         s_routes = routes.filter(
-            pl.col("route_id").is_in(connection.route_ids)
+            pl.col("route_id").is_in(list(connection.route_ids))
         ).get_column("route_id")
 
         # get unique trips for requested connection
@@ -154,17 +464,300 @@ class ApiGtfs:
             .get_column("trip_id")
         )
 
-        times = (
-            stop_times.filter(
-                (pl.col("trip_id").is_in(s_trips))
-                & (pl.col("stop_id") == connection.stop_id)
-            )
-            .get_column("departure_time")
-            .sort()
+        df_times = stop_times.filter(pl.col("trip_id").is_in(s_trips)).select(
+            "trip_id", "departure_time"
         )
 
+        if self._frequencies is not None:
+            df_times = self._expand_frequencies(df_times)
+
+        times = df_times.get_column("departure_time").sort()
+
         return Departures(connection.stop_id, date, times.to_list())
 
+    async def departures_between(
+        self, connections: list[Connection], start: dt.datetime, end: dt.datetime
+    ) -> list[tuple[dt.datetime, Connection]]:
+        """Return departures of provided connections between start and end, sorted by time.
+
+        All connections and service days are answered by one query: trips of the
+        connections are joined with their active service days, instead of asking
+        departures() day by day.
+        """
+        if not connections:
+            return []
+
+        _LOGGER.debug(
+            "Searching departures of %s connection(s) between %s and %s",
+            len(connections),
+            start,
+            end,
+        )
+
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._departures_between, connections, start, end
+        )
+
+    def _departures_between(
+        self, connections: list[Connection], start: dt.datetime, end: dt.datetime
+    ) -> list[tuple[dt.datetime, Connection]]:
+        """Return departures of provided connections between start and end (blocking)."""
+        df_connections = pl.DataFrame(
+            [
+                {
+                    "connection": idx,
+                    "stop_id": x.stop_id,
+                    "route_id": list(x.route_ids),
+                    "direction_id": x.direction_id,
+                    "trip_headsign": x.name,
+                }
+                for idx, x in enumerate(connections)
+            ]
+        ).explode("route_id")
+
+        df_trips = self._trips.join(
+            df_connections.with_columns(
+                pl.col("route_id").cast(pl.Categorical),
+                pl.col("trip_headsign").cast(pl.Categorical),
+                pl.col("direction_id").cast(self._trips.schema["direction_id"]),
+            ),
+            on=["route_id", "direction_id", "trip_headsign"],
+        ).select("trip_id", "service_id", "connection", "stop_id")
+
+        df_times = self._stop_index.stop_times_in(
+            tuple(df_connections.get_column("stop_id").unique())
+        ).select(pl.col("trip_id"), pl.col("stop_id").cast(pl.Utf8), "departure_time")
+
+        df_times = df_times.join(df_trips, on=["trip_id", "stop_id"]).drop_nulls(
+            "departure_time"
+        )
+
+        if self._frequencies is not None:
+            df_times = self._expand_frequencies(df_times)
+
+        # times of a service day may exceed 24h, so the day before start is included
+        df_days = self._active_service_days(
+            start.date() - dt.timedelta(days=1), end.date()
+        )
+
+        df_departures = (
+            df_times.join(df_days, on="service_id")
+            .select(
+                "connection",
+                (
+                    pl.col("date").cast(pl.Datetime("us"))
+                    + pl.duration(seconds=pl.col("departure_time"))
+                )
+                .dt.replace_time_zone(
+                    str(TIMEZONE), ambiguous="earliest", non_existent="null"
+                )
+                .alias("time"),
+            )
+            .filter(
+                pl.col("time").is_between(
+                    start.astimezone(TIMEZONE), end.astimezone(TIMEZONE)
+                )
+            )
+            .sort("time", "connection")
+        )
+
+        return [
+            (time, connections[idx])
+            for idx, time in df_departures.select("connection", "time").iter_rows()
+        ]
+
+    def _active_service_days(self, first: dt.date, last: dt.date) -> pl.DataFrame:
+        """Return (service_id, date) of all services active between first and last date (blocking).
+
+        Same rules as _active_trips, evaluated for all days at once.
+        """
+        df_dates = pl.DataFrame(
+            {"date": pl.date_range(first, last, "1d", eager=True)}
+        ).with_columns(
+            pl.col("date").dt.strftime("%Y%m%d").cast(pl.Int64).alias("date_int"),
+            # polars weekdays are numbered 1 (monday) to 7
+            pl.col("date")
+            .dt.weekday()
+            .replace_strict(
+                {x + 1: weekday_to_str(x) for x in range(7)}, return_dtype=pl.Utf8
+            )
+            .alias("weekday"),
+        )
+
+        weekdays = [weekday_to_str(x) for x in range(7)]
+
+        df_exceptions = self._calendar_dates.select(
+            "service_id",
+            pl.col("date").cast(pl.Int64).alias("date_int"),
+            "exception_type",
+        )
+
+        return (
+            self._calendar.unpivot(
+                index=["service_id", "start_date", "end_date"],
+                on=weekdays,
+                variable_name="weekday",
+                value_name="runs",
+            )
+            .join(df_dates, on="weekday")
+            .join(df_exceptions, on=["service_id", "date_int"], how="left")
+            .filter(
+                (pl.col("exception_type").fill_null(0) != 2)
+                & (pl.col("start_date") < pl.col("date_int"))
+                & (pl.col("end_date") > pl.col("date_int"))
+                & ((pl.col("runs") == 1) | (pl.col("exception_type") == 1))
+            )
+            .select("service_id", "date")
+        )
+
+    def _expand_frequencies(self, df_times: pl.DataFrame) -> pl.DataFrame:
+        """Replace template times of headway based trips by their generated departures.
+
+        Departures of a frequency based trip are generated from its (start, end, headway)
+        ranges shifted by the offset of the stop within the trip. Only the trips passed in
+        are expanded, so no full size stop_times table is ever materialized.
+        """
+        frequencies = self._frequencies.filter(
+            pl.col("trip_id").is_in(df_times.get_column("trip_id"))
+        )
+
+        if frequencies.is_empty():
+            return df_times
+
+        # offset of requested stop relative to first departure of the trip template
+        df_offsets = self._trip_starts.join(df_times, on="trip_id").with_columns(
+            (pl.col("departure_time") - pl.col("first_departure")).alias("offset"),
+        )
+
+        # other columns of df_times are kept for the generated departures
+        df_generated = (
+            frequencies.join(df_offsets, on="trip_id")
+            .with_columns(
+                (
+                    pl.int_ranges(
+                        "start_time", "end_time", "headway_secs", dtype=pl.Int32
+                    )
+                    + pl.col("offset")
+                ).alias("departure_time"),
+            )
+            .select(df_times.columns)
+            .explode("departure_time")
+            .drop_nulls("departure_time")
+        )
+
+        return pl.concat(
+            [
+                df_times.filter(
+                    ~pl.col("trip_id").is_in(frequencies.get_column("trip_id"))
+                ),
+                df_generated,
+            ]
+        )
+
+    async def journey(
+        self, origin: Stop, destination: Stop, departure: dt.datetime
+    ) -> Journey | None:
+        """Return earliest arriving journey from origin to destination starting at departure time."""
+        if not origin or not destination:
+            raise ValueError("No origin or destination stop provided")
+
+        planner = await self._journey_planner()
+
+        date = departure.strftime("%Y%m%d")
+        active_trips = await self._active_trip_mask(date, self._generation)
+        # trips of the previous service day may still run after midnight
+        previous_trips = await self._active_trip_mask(
+            (departure - dt.timedelta(days=1)).strftime("%Y%m%d"), self._generation
+        )
+        seconds = departure.hour * 3600 + departure.minute * 60 + departure.second
+
+        legs = await asyncio.get_running_loop().run_in_executor(
+            None,
+            planner.earliest_arrival,
+            origin.ids,
+            destination.ids,
+            seconds,
+            active_trips,
+            previous_trips,
+        )
+
+        if not legs:
+            _LOGGER.debug(
+                'No journey found from "%s" to "%s"', origin.name, destination.name
+            )
+            return None
+
+        return self._to_journey(date, legs)
+
+    async def _journey_planner(self) -> JourneyPlanner:
+        """Return journey planner, connection index is built on first use."""
+        async with self._planner_lock:
+            if self._planner is None:
+                _LOGGER.debug("Building journey planner index")
+
+                self._planner = await asyncio.get_running_loop().run_in_executor(
+                    None,
+                    JourneyPlanner.build,
+                    self._stops,
+                    self._stop_index.frame(),
+                    self._trips,
+                    self._transfers,
+                )
+
+        return self._planner
+
+    @alru_cache(maxsize=4)
+    async def _active_trip_mask(self, date: str, generation: str) -> bytearray:
+        """Return journey planner mask of trips active on provided date and feed generation."""
+        planner = await self._journey_planner()
+        trips = await self._active_trips(date)
+
+        return planner.trip_mask(trips.cast(pl.Utf8).to_list())
+
+    def _to_journey(
+        self, date: str, legs: list[tuple[str, str, str, int, int]]
+    ) -> Journey:
+        """Convert journey planner legs into a journey object."""
+        trip_ids = [x[0] for x in legs if x[0] is not None]
+        stop_ids = {x[1] for x in legs} | {x[2] for x in legs}
+
+        # categorical ids are filtered first, only the rows of the legs are cast
+        trips = {
+            row["trip_id"]: row
+            for row in self._trips.filter(pl.col("trip_id").is_in(trip_ids))
+            .join(self._routes, on="route_id")
+            .with_columns(pl.col("trip_id").cast(pl.Utf8))
+            .iter_rows(named=True)
+        }
+        stop_names = dict(
+            self._stops.filter(pl.col("stop_id").is_in(list(stop_ids)))
+            .select(pl.col("stop_id").cast(pl.Utf8), "stop_name")
+            .iter_rows()
+        )
+
+        result = []
+
+        for trip_id, from_stop, to_stop, departure, arrival in legs:
+            trip = trips.get(trip_id, {})
+            transport = trip.get("route_type")
+            line_name = (
+                (trip.get("route_short_name") or "") if trip_id is not None else None
+            )
+
+            result.append(
+                JourneyLeg(
+                    stop_names.get(from_stop, from_stop),
+                    stop_names.get(to_stop, to_stop),
+                    seconds_to_datetime(date, departure),
+                    seconds_to_datetime(date, arrival),
+                    line_name,
+                    TransportType(transport) if transport is not None else None,
+                    trip.get("trip_headsign"),
+                )
+            )
+
+        return Journey(result)
+
     async def _active_trips(self, date: str) -> pl.Series:
         """Return all active trips for provided date."""
         trips: pl.DataFrame = self._trips.clone()
@@ -195,40 +788,52 @@ class ApiGtfs:
             "trip_id"
         )
 
-    async def _connections(self, stop_id: str) -> list[Connection]:
-        """Return all connections for provided stop_id."""
-        routes = self._routes.clone()
-        trips = self._trips.clone()
-        stop_times = self._stop_times.clone()
-
-        # find trip_ids
-        trip_ids = (
-            stop_times.filter(pl.col("stop_id") == stop_id).select("trip_id").unique()
+    @alru_cache(maxsize=256)
+    async def _connections(
+        self, stop_ids: tuple[str, ...], versions: tuple[int, ...]
+    ) -> list[Connection]:
+        """Return all connections for provided stop ids, versions of the stops are part of the cache key."""
+        # (stop, trip) pairs of all requested stops
+        df_stop_trips = (
+            self._stop_index.stop_times_in(stop_ids)
+            .select(pl.col("stop_id").cast(pl.Utf8), "trip_id")
+            .unique()
         )
 
-        df_trips = trips.filter(pl.col("trip_id").is_in(trip_ids))
-
-        g_routes = routes.join(df_trips, on="route_id").group_by(
-            ["trip_headsign", "direction_id"]
+        # one aggregated row per stop and connection, rows are turned into (cached) connections
+        df_connections = (
+            df_stop_trips.join(self._trips, on="trip_id")
+            .join(self._routes, on="route_id")
+            .group_by(["stop_id", "trip_headsign", "direction_id"], maintain_order=True)
+            .agg(
+                pl.col("route_short_name").first(),
+                pl.col("route_type").first(),
+                pl.col("route_id").unique(maintain_order=True).cast(pl.Utf8),
+            )
+            .select(
+                "stop_id",
+                "trip_headsign",
+                "route_short_name",
+                "route_type",
+                "direction_id",
+                "route_id",
+            )
         )
 
-        connections: list[Connection] = []
+        return [
+            self._connection(row[:-1] + (tuple(row[-1]),))
+            for row in df_connections.iter_rows()
+        ]
 
-        for name, data in g_routes:
-            c_name = name[0]
-            c_direction = name[1]
-            c_line_name = data.row(0, named=True)["route_short_name"]
-            c_transport = data.row(0, named=True)["route_type"]
-            c_routes = data.unique("route_id").get_column("route_id").to_list()
+    def _connection(self, row: tuple) -> Connection:
+        """Return connection of a row (stop_id, name, line_name, transport, direction_id, route_ids), equal rows return the same object."""
+        if (connection := self._connection_rows.get(row)) is None:
+            connection = self._connection_rows[row] = Connection(*row)
 
-            connections.append(
-                Connection(
-                    stop_id, c_name, c_line_name, c_transport, c_direction, c_routes
-                )
-            )
+        return connection
 
-        return connections
-
-    async def _read_df(self, path) -> pl.DataFrame:
+    async def _read_df(self, path, namespace: str = "") -> pl.DataFrame:
         """Load csv file asyncron."""
-        return await asyncio.get_running_loop().run_in_executor(None, pl.read_csv, path)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, read_table, path, namespace
+        )
@@ -1,13 +1,18 @@
 """Helper classes for the VGN Departures component."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import datetime as dt
 from enum import IntEnum
-import zoneinfo
+import sys
 
 from homeassistant.util import slugify
 
-from .helpers import datestr_to_date
+from .helpers import seconds_to_datetime
+
+
+def _intern(value):
+    """Return interned string, other values (e.g. None) are returned unchanged."""
+    return sys.intern(value) if isinstance(value, str) else value
 
 
 class TransportType(IntEnum):
@@ -51,21 +56,23 @@ class TransportType(IntEnum):
                 return "Unknown"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class Stop:
     """Object represents a bus stop(Haltestelle)."""
 
     name: str
-    ids: list[str]
+    ids: tuple[str, ...]
+    # stop represents a station (parent_station of its stops)
+    is_parent: bool = False
 
-    @property
-    def is_parent(self):
-        """Return whether the stop is a parent stop or not."""
-        return any(x.startswith("Parent") for x in self.ids)
+    def __post_init__(self) -> None:
+        """Intern name and ids, stops are shared by config entries and caches."""
+        object.__setattr__(self, "name", _intern(self.name))
+        object.__setattr__(self, "ids", tuple(sys.intern(str(x)) for x in self.ids))
 
     def to_dict(self):
         """Convert stop object to a dictionary."""
-        return {"name": self.name, "ids": self.ids, "is_parent": self.is_parent}
+        return {"name": self.name, "ids": list(self.ids), "is_parent": self.is_parent}
 
     @classmethod
     def from_dict(cls, stop: dict):
@@ -73,7 +80,7 @@ class Stop:
         if not stop:
             return None
 
-        return Stop(stop["name"], stop["ids"])
+        return Stop(stop["name"], stop["ids"], stop.get("is_parent", False))
 
     def __eq__(self, value: object) -> bool:
         """Overwritten to compare two objects."""
@@ -91,26 +98,39 @@ class Stop:
         return hash(self.name)
 
 
+@dataclass(frozen=True, slots=True, eq=False)
 class Connection:
-    """Class connection contains information about a specific drive trip."""
-
-    def __init__(
-        self,
-        stop_id: str,
-        name: str,
-        line_name: str,
-        transport: TransportType,
-        direction_id: int,
-        route_id_s: list[str],
-    ) -> None:
-        """Create a Connection object."""
-        self.stop_id = stop_id
-        self.name = name
-        self.line_name = line_name
-        self.transport = TransportType(transport)
-        self.direction_id = direction_id
-        self.route_ids = route_id_s
-        self.uid = slugify(f"{stop_id}#{name}#{line_name}#{transport}#{direction_id}")
+    """Class connection contains information about a specific drive trip.
+
+    Connections are immutable and compared by their uid, connections created from rows
+    of the stop index are cached per row by the GTFS api.
+    """
+
+    stop_id: str
+    name: str
+    line_name: str
+    transport: TransportType
+    direction_id: int
+    route_ids: tuple[str, ...]
+    uid: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Normalize and intern fields, compute uid once."""
+        # GTFS ids are loaded as strings, entries created before may contain numbers
+        object.__setattr__(self, "stop_id", sys.intern(str(self.stop_id)))
+        object.__setattr__(self, "name", _intern(self.name))
+        object.__setattr__(self, "line_name", _intern(self.line_name))
+        object.__setattr__(self, "transport", TransportType(self.transport))
+        object.__setattr__(
+            self, "route_ids", tuple(sys.intern(str(x)) for x in self.route_ids)
+        )
+        object.__setattr__(
+            self,
+            "uid",
+            slugify(
+                f"{self.stop_id}#{self.name}#{self.line_name}#{self.transport.value}#{self.direction_id}"
+            ),
+        )
 
     def to_dict(self):
         """Convert connection object to a dictionary."""
@@ -120,7 +140,7 @@ class Connection:
             "line_name": self.line_name,
             "transport": self.transport.value,
             "direction_id": self.direction_id,
-            "route_ids": self.route_ids,
+            "route_ids": list(self.route_ids),
             "uid": self.uid,
         }
 
@@ -130,13 +150,13 @@ class Connection:
         if not connection:
             return None
 
-        return Connection(
+        return cls(
             connection["stop_id"],
             connection["name"],
             connection["line_name"],
             connection["transport"],
             connection["direction_id"],
-            connection["route_ids"],
+            tuple(connection["route_ids"]),
         )
 
     def __eq__(self, value: object) -> bool:
@@ -158,35 +178,72 @@ class Connection:
 class Departures:
     """Contains departure times for a specific connection."""
 
-    def __init__(self, stop_id: str, date: str, times: list[str]) -> None:
-        """Create a Departure object."""
+    def __init__(self, stop_id: str, date: str, times: list[int]) -> None:
+        """Create a Departure object from times in seconds after midnight of date."""
         self.stop_id = stop_id
-        self.times = self._convert_to_datetimes(date, times)
+        self.times = [seconds_to_datetime(date, x) for x in times]
 
-    def _convert_to_datetimes(self, date: str, times: list[str]) -> list[dt.datetime]:
-        r_date = datestr_to_date(date)
+    def to_dict(self) -> dict[str, str | list[str]]:
+        """Convert departures object to a dictionary."""
+        return {"stop_id": self.stop_id, "times": self.times}
 
-        r_times = []
 
-        for time in times:
-            (hour, minute, _) = (int(x) for x in time.split(":"))
+@dataclass
+class JourneyLeg:
+    """Part of a journey: a ride with one vehicle or a walk between two stops."""
 
-            if hour >= 24:
-                r_date = r_date + dt.timedelta(days=1)
+    from_stop: str
+    to_stop: str
+    departure: dt.datetime
+    arrival: dt.datetime
+    line_name: str | None = None
+    transport: TransportType | None = None
+    direction: str | None = None
 
-            r_times.append(
-                dt.datetime(
-                    year=r_date.year,
-                    month=r_date.month,
-                    day=r_date.day,
-                    hour=hour % 24,
-                    minute=minute,
-                    tzinfo=zoneinfo.ZoneInfo("Europe/Berlin"),
-                )
-            )
+    @property
+    def is_walk(self) -> bool:
+        """Return whether the leg is a walk between two stops."""
+        return self.line_name is None
 
-        return r_times
+    def to_dict(self) -> dict:
+        """Convert journey leg object to a dictionary."""
+        return {
+            "from_stop": self.from_stop,
+            "to_stop": self.to_stop,
+            "departure": self.departure,
+            "arrival": self.arrival,
+            "line_name": self.line_name,
+            "transport": str(self.transport) if self.transport is not None else None,
+            "direction": self.direction,
+        }
 
-    def to_dict(self) -> dict[str, str | list[str]]:
-        """Convert departures object to a dictionary."""
-        return {"stop_id": self.stop_id, "times": self.times}
+
+@dataclass
+class Journey:
+    """Earliest arriving journey between two stops."""
+
+    legs: list[JourneyLeg]
+
+    @property
+    def departure(self) -> dt.datetime:
+        """Return departure time of the first leg."""
+        return self.legs[0].departure
+
+    @property
+    def arrival(self) -> dt.datetime:
+        """Return arrival time of the last leg."""
+        return self.legs[-1].arrival
+
+    @property
+    def transfers(self) -> int:
+        """Return number of vehicle changes."""
+        return max(len([x for x in self.legs if not x.is_walk]) - 1, 0)
+
+    def to_dict(self) -> dict:
+        """Convert journey object to a dictionary."""
+        return {
+            "departure": self.departure,
+            "arrival": self.arrival,
+            "transfers": self.transfers,
+            "legs": [x.to_dict() for x in self.legs],
+        }
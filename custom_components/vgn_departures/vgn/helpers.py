@@ -1,6 +1,11 @@
 """Helper classes."""
 
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+import zoneinfo
+
+import polars as pl
+
+TIMEZONE = zoneinfo.ZoneInfo("Europe/Berlin")
 
 
 def datestr_to_date(x: str, format_str: str = "%Y%m%d") -> date:
@@ -18,3 +23,45 @@ def weekday_to_str(weekday: int) -> str | None:
         return s[weekday]
     except IndexError:
         return None
+
+
+def seconds_to_datetime(day: str, seconds: int) -> datetime:
+    """Convert seconds after midnight of a service day (may exceed 24h) to a datetime object."""
+    r_date = datestr_to_date(day) + timedelta(days=seconds // 86400)
+    seconds = seconds % 86400
+
+    return datetime(
+        year=r_date.year,
+        month=r_date.month,
+        day=r_date.day,
+        hour=seconds // 3600,
+        minute=seconds % 3600 // 60,
+        second=seconds % 60,
+        tzinfo=TIMEZONE,
+    )
+
+
+def seconds_expr(column: str) -> pl.Expr:
+    """Return expression converting a GTFS time column (HH:MM:SS) into seconds after midnight."""
+    parts = pl.col(column).cast(pl.Utf8).str.strip_chars().str.split(":")
+
+    return (
+        parts.list.get(0).cast(pl.Int32) * 3600
+        + parts.list.get(1).cast(pl.Int32) * 60
+        + parts.list.get(2).cast(pl.Int32)
+    )
+
+
+def location_type_expr(stops: pl.DataFrame) -> pl.Expr:
+    """Return expression of the GTFS location_type as integer (empty means 0, a stop or platform)."""
+    if "location_type" not in stops.columns:
+        return pl.lit(0, dtype=pl.Int32).alias("location_type")
+
+    return (
+        pl.col("location_type")
+        .cast(pl.Utf8)
+        .str.strip_chars()
+        .cast(pl.Int32, strict=False)
+        .fill_null(0)
+        .alias("location_type")
+    )
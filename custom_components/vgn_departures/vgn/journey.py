@@ -0,0 +1,314 @@
+"""Connection Scan based journey planner for GTFS data."""
+
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator
+import heapq
+import logging
+
+import polars as pl
+
+_LOGGER = logging.getLogger(__name__)
+
+# minimum time (seconds) needed to change vehicles at the same stop if transfers.txt has no entry
+DEFAULT_TRANSFER_TIME = 120
+# transfer_type in transfers.txt marking a transfer as not possible
+TRANSFER_NOT_POSSIBLE = 3
+
+INFINITY = 1 << 30
+# trips of the previous service day are shifted by one day
+DAY = 86400
+
+
+class JourneyPlanner:
+    """Earliest arrival queries over elementary connections (Connection Scan Algorithm).
+
+    Every pair of consecutive stops of a trip is stored as one elementary connection.
+    Connections are kept in flat arrays sorted by departure time, stops and trips are
+    referenced by integer index.
+    """
+
+    def __init__(
+        self,
+        stop_ids: list[str],
+        trip_ids: list[str],
+        dep_stop: array,
+        arr_stop: array,
+        dep_time: array,
+        arr_time: array,
+        trip: array,
+        change_times: dict[int, int],
+        footpaths: dict[int, list[tuple[int, int]]],
+    ) -> None:
+        """Create planner from prepared connection arrays."""
+        self.stop_ids = stop_ids
+        self.trip_ids = trip_ids
+        self.stop_index = {stop_id: idx for idx, stop_id in enumerate(stop_ids)}
+        self.trip_index = {trip_id: idx for idx, trip_id in enumerate(trip_ids)}
+        self._dep_stop = dep_stop
+        self._arr_stop = arr_stop
+        self._dep_time = dep_time
+        self._arr_time = arr_time
+        self._trip = trip
+        self._change_times = change_times
+        self._footpaths = footpaths
+
+    def __len__(self) -> int:
+        """Return number of elementary connections."""
+        return len(self._dep_time)
+
+    @classmethod
+    def build(
+        cls,
+        stops: pl.DataFrame,
+        stop_times: pl.DataFrame,
+        trips: pl.DataFrame,
+        transfers: pl.DataFrame | None,
+    ) -> "JourneyPlanner":
+        """Derive elementary connections from stop_times and transfer times from transfers."""
+        df_stops = (
+            stops.select(pl.col("stop_id").cast(pl.Utf8))
+            .unique(maintain_order=True)
+            .with_row_index("stop_idx")
+        )
+        df_trips = (
+            trips.select(pl.col("trip_id").cast(pl.Utf8))
+            .unique(maintain_order=True)
+            .with_row_index("trip_idx")
+        )
+
+        df_connections = (
+            stop_times.select(
+                pl.col("trip_id").cast(pl.Utf8),
+                pl.col("stop_id").cast(pl.Utf8),
+                pl.col("stop_sequence"),
+                pl.col("departure_time").alias("dep_time"),
+                pl.col("arrival_time").alias("arr_time"),
+            )
+            .sort(["trip_id", "stop_sequence"])
+            .with_columns(
+                pl.col("stop_id").shift(-1).over("trip_id").alias("to_stop_id"),
+                pl.col("arr_time").shift(-1).over("trip_id").alias("to_arr_time"),
+            )
+            .drop_nulls(["to_stop_id", "to_arr_time", "dep_time"])
+            .join(df_trips, on="trip_id")
+            .join(df_stops, on="stop_id")
+            .join(
+                df_stops.rename({"stop_id": "to_stop_id", "stop_idx": "to_stop_idx"}),
+                on="to_stop_id",
+            )
+            .sort(["dep_time", "to_arr_time"])
+        )
+
+        change_times: dict[int, int] = {}
+        footpaths: dict[int, list[tuple[int, int]]] = {}
+
+        if transfers is not None:
+            df_transfers = (
+                transfers.filter(
+                    pl.col("transfer_type").fill_null(0) != TRANSFER_NOT_POSSIBLE
+                )
+                .select(
+                    pl.col("from_stop_id").cast(pl.Utf8).alias("stop_id"),
+                    pl.col("to_stop_id").cast(pl.Utf8),
+                    pl.col("min_transfer_time")
+                    .fill_null(DEFAULT_TRANSFER_TIME)
+                    .cast(pl.Int32),
+                )
+                .join(df_stops, on="stop_id")
+                .join(
+                    df_stops.rename(
+                        {"stop_id": "to_stop_id", "stop_idx": "to_stop_idx"}
+                    ),
+                    on="to_stop_id",
+                )
+            )
+
+            for from_idx, to_idx, duration in df_transfers.select(
+                "stop_idx", "to_stop_idx", "min_transfer_time"
+            ).iter_rows():
+                if from_idx == to_idx:
+                    change_times[from_idx] = duration
+                else:
+                    footpaths.setdefault(from_idx, []).append((to_idx, duration))
+
+        _LOGGER.debug(
+            "Journey planner built with %s connection(s)", df_connections.height
+        )
+
+        return cls(
+            df_stops.get_column("stop_id").to_list(),
+            df_trips.get_column("trip_id").to_list(),
+            array("i", df_connections.get_column("stop_idx").to_list()),
+            array("i", df_connections.get_column("to_stop_idx").to_list()),
+            array("i", df_connections.get_column("dep_time").to_list()),
+            array("i", df_connections.get_column("to_arr_time").to_list()),
+            array("i", df_connections.get_column("trip_idx").to_list()),
+            change_times,
+            footpaths,
+        )
+
+    def trip_mask(self, trip_ids: list[str]) -> bytearray:
+        """Return a mask marking provided trips as active."""
+        mask = bytearray(len(self.trip_ids))
+
+        for trip_id in trip_ids:
+            idx = self.trip_index.get(trip_id)
+            if idx is not None:
+                mask[idx] = 1
+
+        return mask
+
+    def _scan(self, departure: int, previous_day: bool) -> Iterator[int]:
+        """Return connections from departure in order of departure time.
+
+        Connections of the service day are referenced by their index, connections of the
+        previous service day after midnight by -1 - index.
+        """
+        today = range(bisect_left(self._dep_time, departure), len(self._dep_time))
+        start = bisect_left(self._dep_time, departure + DAY)
+
+        if not previous_day or start == len(self._dep_time):
+            return iter(today)
+
+        return heapq.merge(
+            today,
+            range(-1 - start, -1 - len(self._dep_time), -1),
+            key=lambda x: self._dep_time[x] if x >= 0 else self._dep_time[-1 - x] - DAY,
+        )
+
+    def earliest_arrival(
+        self,
+        origins: list[str],
+        destinations: list[str],
+        departure: int,
+        active_trips: bytearray,
+        previous_trips: bytearray | None = None,
+    ) -> list[tuple[str, str, str, int, int]] | None:
+        """Return legs of the earliest arriving journey or None if destination is not reachable.
+
+        Each leg is a tuple (trip_id, from_stop_id, to_stop_id, departure, arrival), trip_id
+        is None for walking legs. Times are seconds after midnight of the service day,
+        trips active on the previous service day (previous_trips) are boarded after
+        midnight with their times shifted by one day.
+        """
+        targets = {self.stop_index[x] for x in destinations if x in self.stop_index}
+        sources = {self.stop_index[x] for x in origins if x in self.stop_index}
+
+        if not targets or not sources:
+            return None
+
+        dep_stop = self._dep_stop
+        arr_stop = self._arr_stop
+        dep_time = self._dep_time
+        arr_time = self._arr_time
+        trip = self._trip
+        change_times = self._change_times
+        footpaths = self._footpaths
+
+        # earliest time a vehicle can be boarded at a stop
+        ready: dict[int, int] = dict.fromkeys(sources, departure)
+        # how a stop was reached: (connection reference, walked from stop index or -1)
+        reached_by: dict[int, tuple[int, int]] = {}
+        # connection reference a trip was boarded at, trips of the previous day by -1 - index
+        boarded: dict[int, int] = {}
+
+        best_arrival = INFINITY
+        best_connection: int | None = None
+
+        for ref in self._scan(departure, previous_trips is not None):
+            if ref >= 0:
+                idx, offset, mask, trip_key = ref, 0, active_trips, trip[ref]
+            else:
+                idx = -1 - ref
+                offset, mask, trip_key = DAY, previous_trips, -1 - trip[idx]
+
+            time = dep_time[idx] - offset
+
+            if time >= best_arrival:
+                break
+
+            if not mask[trip[idx]]:
+                continue
+
+            if trip_key not in boarded:
+                if ready.get(dep_stop[idx], INFINITY) > time:
+                    continue
+                boarded[trip_key] = ref
+
+            stop = arr_stop[idx]
+            arrival = arr_time[idx] - offset
+
+            if stop in targets and arrival < best_arrival:
+                best_arrival = arrival
+                best_connection = ref
+
+            change = arrival + change_times.get(stop, DEFAULT_TRANSFER_TIME)
+
+            if change < ready.get(stop, INFINITY):
+                ready[stop] = change
+                reached_by[stop] = (ref, -1)
+
+            for to_stop, duration in footpaths.get(stop, ()):
+                if arrival + duration < ready.get(to_stop, INFINITY):
+                    ready[to_stop] = arrival + duration
+                    reached_by[to_stop] = (ref, stop)
+
+        if best_connection is None:
+            return None
+
+        return self._legs(best_connection, sources, reached_by, boarded)
+
+    def _legs(
+        self,
+        last_connection: int,
+        sources: set[int],
+        reached_by: dict[int, tuple[int, int]],
+        boarded: dict[int, int],
+    ) -> list[tuple[str, str, str, int, int]]:
+        """Reconstruct journey legs walking back from last used connection reference."""
+        legs = []
+        ref = last_connection
+
+        while True:
+            connection, offset = (ref, 0) if ref >= 0 else (-1 - ref, DAY)
+            trip_idx = self._trip[connection]
+            first = -1 - boarded[-1 - trip_idx] if offset else boarded[trip_idx]
+            stop = self._dep_stop[first]
+
+            legs.append(
+                (
+                    self.trip_ids[trip_idx],
+                    self.stop_ids[stop],
+                    self.stop_ids[self._arr_stop[connection]],
+                    self._dep_time[first] - offset,
+                    self._arr_time[connection] - offset,
+                )
+            )
+
+            if stop in sources:
+                break
+
+            ref, walked_from = reached_by[stop]
+
+            if walked_from >= 0:
+                arrival = (
+                    self._arr_time[ref] if ref >= 0 else self._arr_time[-1 - ref] - DAY
+                )
+                legs.append(
+                    (
+                        None,
+                        self.stop_ids[walked_from],
+                        self.stop_ids[stop],
+                        arrival,
+                        arrival + self._footpath_duration(walked_from, stop),
+                    )
+                )
+
+        return legs[::-1]
+
+    def _footpath_duration(self, from_stop: int, to_stop: int) -> int:
+        """Return walking duration between two stops."""
+        return next(
+            (d for s, d in self._footpaths.get(from_stop, ()) if s == to_stop), 0
+        )
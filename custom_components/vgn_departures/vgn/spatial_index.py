@@ -0,0 +1,101 @@
+"""Grid based spatial index over GTFS stops."""
+
+from array import array
+import logging
+import math
+
+import polars as pl
+
+_LOGGER = logging.getLogger(__name__)
+
+EARTH_RADIUS = 6371000
+# edge length of a grid cell in degrees (about 1.1 km in latitude)
+CELL_SIZE = 0.01
+# default search radius in metres
+DEFAULT_RADIUS = 1000
+
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return great circle distance of two coordinates in metres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+class SpatialIndex:
+    """Stops bucketed into a regular latitude/longitude grid.
+
+    A radius query only inspects the cells overlapping the bounding box of the search
+    circle, so it does not depend on the number of stops in the feed.
+    """
+
+    def __init__(self, stops: pl.DataFrame, cell_size: float = CELL_SIZE) -> None:
+        """Create index from stops table, stops without coordinates are skipped."""
+        df = (
+            stops.select(
+                pl.col("stop_id").cast(pl.Utf8),
+                pl.col("stop_name").cast(pl.Utf8),
+                pl.col("stop_lat").cast(pl.Float64, strict=False),
+                pl.col("stop_lon").cast(pl.Float64, strict=False),
+            )
+            .drop_nulls(["stop_lat", "stop_lon"])
+            .with_row_index("idx")
+        )
+
+        self._cell_size = cell_size
+        self._stop_ids: list[str] = df.get_column("stop_id").to_list()
+        self._stop_names: list[str] = df.get_column("stop_name").to_list()
+        self._lat = array("d", df.get_column("stop_lat").to_list())
+        self._lon = array("d", df.get_column("stop_lon").to_list())
+        self._cells: dict[tuple[int, int], list[int]] = {
+            (lat, lon): idx
+            for lat, lon, idx in df.group_by(
+                (pl.col("stop_lat") / cell_size).floor().cast(pl.Int32).alias("lat"),
+                (pl.col("stop_lon") / cell_size).floor().cast(pl.Int32).alias("lon"),
+            )
+            .agg("idx")
+            .iter_rows()
+        }
+
+        _LOGGER.debug(
+            "Spatial index built with %s stop(s) in %s cell(s)",
+            len(self._stop_ids),
+            len(self._cells),
+        )
+
+    def __len__(self) -> int:
+        """Return number of indexed stops."""
+        return len(self._stop_ids)
+
+    def near(
+        self, latitude: float, longitude: float, radius: float = DEFAULT_RADIUS
+    ) -> list[tuple[float, str, str]]:
+        """Return (distance, stop_id, stop_name) of stops within radius metres, closest first."""
+        delta_lat = math.degrees(radius / EARTH_RADIUS)
+        delta_lon = delta_lat / max(math.cos(math.radians(latitude)), 1e-6)
+        size = self._cell_size
+
+        result = []
+
+        for cell_lat in range(
+            math.floor((latitude - delta_lat) / size),
+            math.floor((latitude + delta_lat) / size) + 1,
+        ):
+            for cell_lon in range(
+                math.floor((longitude - delta_lon) / size),
+                math.floor((longitude + delta_lon) / size) + 1,
+            ):
+                for idx in self._cells.get((cell_lat, cell_lon), ()):
+                    dist = distance(latitude, longitude, self._lat[idx], self._lon[idx])
+
+                    if dist <= radius:
+                        result.append(
+                            (dist, self._stop_ids[idx], self._stop_names[idx])
+                        )
+
+        return sorted(result)
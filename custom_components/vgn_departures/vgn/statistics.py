@@ -0,0 +1,80 @@
+"""Service statistics derived from sorted departure times."""
+
+from dataclasses import dataclass
+import datetime as dt
+
+import polars as pl
+
+from .helpers import TIMEZONE
+
+# span of the headway statistic in seconds
+HEADWAY_SPAN = 3600
+
+
+@dataclass(frozen=True, slots=True)
+class DepartureStatistics:
+    """Statistics of a connection at a point in time."""
+
+    next_departure: dt.datetime | None
+    # average minutes between departures within the next hour
+    headway: float | None
+    remaining_today: int
+    last_departure_today: dt.datetime | None
+
+
+def timestamps(times: list[dt.datetime]) -> pl.Series:
+    """Return sorted departure times as series of unix timestamps."""
+    return pl.Series(
+        "timestamp", [int(x.timestamp()) for x in times], dtype=pl.Int64
+    ).sort()
+
+
+def window_bounds(series: pl.Series, now: dt.datetime) -> tuple[int, int, int, int]:
+    """Return indices of the first departure from now, after the next hour, of today and after today.
+
+    The statistics only change if one of these bounds changes.
+    """
+    today = now.astimezone(TIMEZONE).date()
+    day_start = dt.datetime.combine(today, dt.time(), TIMEZONE)
+    midnight = dt.datetime.combine(today + dt.timedelta(days=1), dt.time(), TIMEZONE)
+    # number of departures before each bound is the index of the bound
+    bounds = (
+        series.to_frame()
+        .select(
+            (pl.col("timestamp") < int(now.timestamp())).sum(),
+            (pl.col("timestamp") <= int(now.timestamp()) + HEADWAY_SPAN)
+            .sum()
+            .alias("hour"),
+            (pl.col("timestamp") < int(day_start.timestamp())).sum().alias("day_start"),
+            (pl.col("timestamp") < int(midnight.timestamp())).sum().alias("day"),
+        )
+        .row(0)
+    )
+
+    return bounds[0], bounds[1], bounds[2], bounds[3]
+
+
+def departure_statistics(
+    series: pl.Series, bounds: tuple[int, int, int, int]
+) -> DepartureStatistics:
+    """Compute statistics of sorted timestamps for window bounds (see window_bounds)."""
+    first, hour_end, day_start, day_end = bounds
+
+    # kept after the last departure of today has left
+    last_today = (
+        dt.datetime.fromtimestamp(series[day_end - 1], TIMEZONE)
+        if day_end > day_start
+        else None
+    )
+
+    if first >= len(series):
+        return DepartureStatistics(None, None, 0, last_today)
+
+    headway = series.slice(first, hour_end - first).diff().drop_nulls().mean()
+
+    return DepartureStatistics(
+        dt.datetime.fromtimestamp(series[first], TIMEZONE),
+        headway / 60 if headway is not None else None,
+        max(day_end - first, 0),
+        last_today,
+    )
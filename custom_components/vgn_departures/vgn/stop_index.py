@@ -0,0 +1,333 @@
+"""Per stop and per station index over GTFS data and diff of two GTFS feed generations."""
+
+import logging
+
+import polars as pl
+
+from .data_classes import Stop
+from .helpers import location_type_expr
+
+_LOGGER = logging.getLogger(__name__)
+
+# GTFS location types
+LOCATION_TYPE_STOP = 0
+LOCATION_TYPE_STATION = 1
+
+# columns of stop_times hashed to detect changed trips
+STOP_TIMES_DIGEST_COLUMNS = (
+    "stop_id",
+    "stop_sequence",
+    "arrival_time",
+    "departure_time",
+)
+
+# share of outdated and overlay rows in the base table that triggers a compaction
+COMPACT_RATIO = 0.1
+
+
+class StopIndex:
+    """Rows of stop_times grouped by stop id.
+
+    The table is sorted by stop once, rows of a stop are returned as zero-copy slice of
+    this base table. Stops rebuilt by an incremental update are served from an overlay,
+    every rebuild increases the version of the stop so results cached per
+    (stop, version) do not need explicit invalidation. Once the overlay grows too
+    large, the base table is rebuilt by compacted().
+    """
+
+    def __init__(
+        self, stop_times: pl.DataFrame, versions: dict[str, int] | None = None
+    ) -> None:
+        """Create index from stop_times table, versions of a previous index are kept."""
+        self._base = stop_times.sort("stop_id")
+        self._ranges: dict[str, tuple[int, int]] = {
+            stop_id: (offset, length)
+            for stop_id, offset, length in self._base.with_row_index("offset")
+            .group_by(pl.col("stop_id").cast(pl.Utf8))
+            .agg(pl.col("offset").first(), pl.len())
+            .iter_rows()
+        }
+        self._overlay: dict[str, pl.DataFrame] = {}
+        # stops whose rows of the base table are outdated and their number of rows
+        self._replaced: set[str] = set()
+        self._outdated_rows: int = 0
+        self._versions: dict[str, int] = dict(versions or {})
+
+    def __contains__(self, stop_id: str) -> bool:
+        """Return whether stop has any stop_times."""
+        return stop_id in self._ranges or stop_id in self._overlay
+
+    def version(self, stop_id: str) -> int:
+        """Return version of stop, increased on every rebuild of the stop."""
+        return self._versions.get(stop_id, 0)
+
+    def stop_times(self, stop_id: str) -> pl.DataFrame:
+        """Return stop_times rows of a single stop."""
+        if stop_id in self._overlay:
+            return self._overlay[stop_id]
+
+        if stop_id in self._ranges:
+            return self._base.slice(*self._ranges[stop_id])
+
+        return self._base.clear()
+
+    def stop_times_in(self, stop_ids: tuple[str, ...]) -> pl.DataFrame:
+        """Return stop_times rows of several stops (e.g. all platforms of a station)."""
+        frames = [self.stop_times(x) for x in stop_ids if x in self]
+
+        if not frames:
+            return self._base.clear()
+
+        # slices are only referenced by the concatenated frame, not copied
+        return pl.concat(frames, rechunk=False)
+
+    def frame(self) -> pl.DataFrame:
+        """Return complete stop_times table including rebuilt stops."""
+        if not self._replaced:
+            return self._base
+
+        return pl.concat(
+            [
+                self._base.filter(~pl.col("stop_id").is_in(list(self._replaced))),
+                *self._overlay.values(),
+            ]
+        )
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Return whether outdated and overlay rows exceed the compaction ratio."""
+        overlay_rows = sum(x.height for x in self._overlay.values())
+
+        return self._outdated_rows + overlay_rows > self._base.height * COMPACT_RATIO
+
+    def compacted(self) -> "StopIndex":
+        """Return new index with rebuilt stops merged into the base table (blocking).
+
+        Versions are kept, rows of all stops are unchanged.
+        """
+        _LOGGER.debug(
+            "Compacting stop index, %s outdated row(s), %s rebuilt stop(s)",
+            self._outdated_rows,
+            len(self._overlay),
+        )
+
+        return StopIndex(self.frame(), self._versions)
+
+    @staticmethod
+    def partition(
+        stop_times: pl.DataFrame, stop_ids: set[str]
+    ) -> dict[str, pl.DataFrame]:
+        """Return rows of provided stops partitioned by stop id."""
+        return {
+            key[0]: df
+            for key, df in stop_times.filter(pl.col("stop_id").is_in(list(stop_ids)))
+            .partition_by("stop_id", as_dict=True)
+            .items()
+        }
+
+    def replace(self, stop_ids: set[str], slices: dict[str, pl.DataFrame]) -> None:
+        """Replace rows of provided stops by slices (see partition)."""
+        for stop_id in stop_ids:
+            if stop_id in self._ranges:
+                self._outdated_rows += self._ranges.pop(stop_id)[1]
+                self._replaced.add(stop_id)
+
+            self._overlay.pop(stop_id, None)
+
+            if stop_id in slices:
+                self._overlay[stop_id] = slices[stop_id]
+
+            self._versions[stop_id] = self.version(stop_id) + 1
+
+        _LOGGER.debug("Rebuilt %s stop slice(s)", len(stop_ids))
+
+
+class StationIndex:
+    """Parent station tree of GTFS stops.
+
+    Every stop (location_type 0) is resolved to its station (location_type 1) via
+    parent_station once at load time. Stops of a station are grouped by the station,
+    stops without station are grouped by their name.
+    """
+
+    def __init__(self, stops: pl.DataFrame) -> None:
+        """Create index from stops table."""
+        df = stops.select(
+            pl.col("stop_id").cast(pl.Utf8),
+            pl.col("stop_name").cast(pl.Utf8),
+            location_type_expr(stops),
+            (
+                pl.col("parent_station").cast(pl.Utf8)
+                if "parent_station" in stops.columns
+                else pl.lit(None, dtype=pl.Utf8).alias("parent_station")
+            ),
+        )
+
+        df_stations = df.filter(
+            pl.col("location_type") == LOCATION_TYPE_STATION
+        ).select(
+            pl.col("stop_id").alias("parent_station"),
+            pl.col("stop_name").alias("station_name"),
+        )
+
+        self._groups: pl.DataFrame = (
+            df.filter(pl.col("location_type") == LOCATION_TYPE_STOP)
+            .join(df_stations, on="parent_station", how="left")
+            .group_by(pl.coalesce("station_name", "stop_name").alias("name"))
+            .agg(
+                pl.col("stop_id"),
+                pl.col("parent_station")
+                .filter(pl.col("station_name").is_not_null())
+                .unique()
+                .alias("station_ids"),
+            )
+            .sort("name")
+        )
+        # name of the group every stop belongs to
+        self._names: dict[str, str] = dict(
+            self._groups.explode("stop_id").select("stop_id", "name").iter_rows()
+        )
+
+        _LOGGER.debug(
+            "Station index built with %s stop group(s) of %s station(s)",
+            self._groups.height,
+            df_stations.height,
+        )
+
+    def stops(self, name: str | None = None, incl_parents: bool = False) -> list[Stop]:
+        """Return stops (stations or stops without station) sorted by name.
+
+        Stations contain the ids of all their stops, station ids are added on request.
+        """
+        df = self._groups
+
+        if name:
+            df = df.filter(pl.col("name").str.contains(f"(?i){name}"))
+
+        return [
+            Stop(
+                name,
+                stop_ids + station_ids if incl_parents else stop_ids,
+                bool(station_ids),
+            )
+            for name, stop_ids, station_ids in df.iter_rows()
+        ]
+
+    def stops_of(self, stop_ids: list[str]) -> list[Stop]:
+        """Return stops (stations or stops without station) containing provided stop ids.
+
+        Stops are returned in order of the first provided id of each, unknown ids are ignored.
+        """
+        names = list(
+            dict.fromkeys(self._names[x] for x in stop_ids if x in self._names)
+        )
+        rows = {
+            row[0]: row
+            for row in self._groups.filter(pl.col("name").is_in(names)).iter_rows()
+        }
+
+        return [Stop(name, rows[name][1], bool(rows[name][2])) for name in names]
+
+
+def _digest(df: pl.DataFrame, key: str, columns: list[str] | None = None):
+    """Return one digest per key over all (or provided) columns of a table."""
+    columns = columns or [x for x in df.columns if x != key]
+
+    return (
+        df.select(
+            pl.col(key).cast(pl.Utf8),
+            # shifted so the sum over all rows of a key can not overflow
+            (pl.struct(columns).hash() // (1 << 20)).alias("digest"),
+        )
+        .group_by(key)
+        .agg(pl.col("digest").sum())
+    )
+
+
+def changed_keys(
+    old: pl.DataFrame | None,
+    new: pl.DataFrame | None,
+    key: str,
+    columns: list[str] | None = None,
+) -> set[str]:
+    """Return keys whose rows were added, removed or modified between two tables."""
+    if old is None and new is None:
+        return set()
+
+    if old is None or new is None or old.schema != new.schema:
+        return {
+            str(x)
+            for df in (old, new)
+            if df is not None
+            for x in df.get_column(key).unique().to_list()
+        }
+
+    return set(
+        _digest(old, key, columns)
+        .join(
+            _digest(new, key, columns),
+            on=key,
+            how="full",
+            coalesce=True,
+            suffix="_new",
+        )
+        .filter(pl.col("digest").ne_missing(pl.col("digest_new")))
+        .get_column(key)
+        .to_list()
+    )
+
+
+def changed_trips(old: dict[str, pl.DataFrame], new: dict[str, pl.DataFrame]):
+    """Return ids of trips whose schedule differs between two feed generations.
+
+    A trip is changed if its own row, its stop_times, its frequencies, its route or the
+    calendar entries of its service differ.
+    """
+    trips = changed_keys(old.get("trips.txt"), new.get("trips.txt"), "trip_id")
+    trips |= changed_keys(
+        old.get("stop_times.txt"),
+        new.get("stop_times.txt"),
+        "trip_id",
+        list(STOP_TIMES_DIGEST_COLUMNS),
+    )
+    trips |= changed_keys(
+        old.get("frequencies.txt"), new.get("frequencies.txt"), "trip_id"
+    )
+
+    routes = changed_keys(old.get("routes.txt"), new.get("routes.txt"), "route_id")
+    services = changed_keys(
+        old.get("calendar.txt"), new.get("calendar.txt"), "service_id"
+    ) | changed_keys(
+        old.get("calendar_dates.txt"), new.get("calendar_dates.txt"), "service_id"
+    )
+
+    if routes or services:
+        for df in (old.get("trips.txt"), new.get("trips.txt")):
+            if df is None:
+                continue
+
+            trips |= set(
+                df.filter(
+                    pl.col("route_id").cast(pl.Utf8).is_in(list(routes))
+                    | pl.col("service_id").cast(pl.Utf8).is_in(list(services))
+                )
+                .get_column("trip_id")
+                .cast(pl.Utf8)
+                .to_list()
+            )
+
+    return trips
+
+
+def stops_of_trips(stop_times: pl.DataFrame | None, trip_ids: set[str]) -> set[str]:
+    """Return ids of all stops served by provided trips."""
+    if stop_times is None or not trip_ids:
+        return set()
+
+    return set(
+        stop_times.filter(pl.col("trip_id").cast(pl.Utf8).is_in(list(trip_ids)))
+        .get_column("stop_id")
+        .cast(pl.Utf8)
+        .unique()
+        .to_list()
+    )
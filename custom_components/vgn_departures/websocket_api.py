@@ -0,0 +1,262 @@
+"""Websocket API of the VGN Departures integration."""
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_ADDED,
+    ATTR_DEPARTED,
+    ATTR_DEPARTURES,
+    ATTR_ID,
+    ATTR_MINUTES,
+    ATTR_REMOVED,
+    ATTR_STOPS,
+    DATA_DEPARTURE_WINDOWS,
+    DOMAIN,
+    FETCH_UPDATE_INTERVAL,
+    REQUEST_TIME_SPAN,
+    WS_SUBSCRIBE_DEPARTURES,
+)
+from .coordinator import get_api, get_departure_dict, get_entity_connection
+from .vgn.api_gtfs import ApiGtfs
+from .vgn.data_classes import Connection
+from .vgn.exceptions import GtfsFileNotFound
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register websocket commands of the integration."""
+    websocket_api.async_register_command(hass, ws_subscribe_departures)
+
+
+class DepartureWindow:
+    """Departures of connections within a window moving with the current time.
+
+    Departures are queried for twice the window span and served from this horizon on
+    following ticks, the GTFS data is queried again only when the window reaches the end
+    of the horizon or the feed generation has changed. Subscriptions of the same
+    connections and span share one window, it is advanced while it has listeners.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: ApiGtfs,
+        connections: list[Connection],
+        span: timedelta,
+    ) -> None:
+        """Initialize empty window."""
+        self._hass = hass
+        self._api = api
+        self._connections = connections
+        self._span = span
+        self._lock = asyncio.Lock()
+        self._listeners: list[Callable[[list[str], list[dict], list[str]], None]] = []
+        self._unsub_tick: CALLBACK_TYPE | None = None
+        # departures of the horizon and their ids
+        self._upcoming: list[tuple[datetime, Connection]] = []
+        self._upcoming_ids: list[str] = []
+        self._horizon_end: datetime | None = None
+        self._generation: str | None = None
+        # departures of the window sent to the clients
+        self._window: dict[str, dict] = {}
+
+    @property
+    def departures(self) -> list[dict]:
+        """Return departures of the window."""
+        return list(self._window.values())
+
+    @callback
+    def async_add_listener(
+        self, listener: Callable[[list[str], list[dict], list[str]], None]
+    ) -> Callable[[], bool]:
+        """Add listener of window changes, return callback removing it.
+
+        The callback returns whether the window has no listeners anymore.
+        """
+        self._listeners.append(listener)
+
+        if self._unsub_tick is None:
+            self._unsub_tick = async_track_time_interval(
+                self._hass, self._async_tick, timedelta(seconds=FETCH_UPDATE_INTERVAL)
+            )
+
+        @callback
+        def remove_listener() -> bool:
+            self._listeners.remove(listener)
+
+            if not self._listeners and self._unsub_tick:
+                self._unsub_tick()
+                self._unsub_tick = None
+
+            return not self._listeners
+
+        return remove_listener
+
+    async def _async_tick(self, _now: datetime) -> None:
+        await self.async_update(dt_util.now())
+
+    async def async_update(self, now: datetime) -> None:
+        """Move window to now and send changes to all listeners."""
+        departed, added, removed = await self.async_advance(now)
+
+        if not (departed or added or removed):
+            return
+
+        for listener in list(self._listeners):
+            listener(departed, added, removed)
+
+    async def async_advance(
+        self, now: datetime
+    ) -> tuple[list[str], list[dict], list[str]]:
+        """Move window to now and return ids of departed, added departures and ids of removed ones."""
+        async with self._lock:
+            return await self._async_advance(now)
+
+    async def _async_advance(
+        self, now: datetime
+    ) -> tuple[list[str], list[dict], list[str]]:
+        end = now + self._span
+
+        if (
+            self._horizon_end is None
+            or self._horizon_end < end
+            or self._generation != self._api.generation
+        ):
+            self._horizon_end = now + 2 * self._span
+            self._generation = self._api.generation
+            self._upcoming = await self._api.departures_between(
+                self._connections, now, self._horizon_end
+            )
+            self._upcoming_ids = [
+                f"{connection.uid}@{int(time.timestamp())}"
+                for time, connection in self._upcoming
+            ]
+
+        # drop departures before now, so a tick only looks at the window
+        first = bisect_left(self._upcoming, now, key=lambda x: x[0])
+        del self._upcoming[:first]
+        del self._upcoming_ids[:first]
+
+        window = {}
+
+        for (time, connection), departure_id in zip(self._upcoming, self._upcoming_ids):
+            if time > end:
+                break
+
+            window[departure_id] = self._window.get(departure_id) or {
+                ATTR_ID: departure_id
+            } | get_departure_dict(time, connection)
+
+        gone = [x for x in self._window if x not in window]
+        departed = [x for x in gone if int(x.rsplit("@", 1)[1]) < now.timestamp()]
+        removed = [x for x in gone if x not in departed]
+        added = [window[x] for x in window if x not in self._window]
+
+        self._window = window
+
+        return departed, added, removed
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_SUBSCRIBE_DEPARTURES,
+        vol.Optional(ATTR_ENTITY_ID, default=[]): cv.entity_ids,
+        vol.Optional(ATTR_STOPS, default=[]): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_MINUTES, default=REQUEST_TIME_SPAN): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1440)
+        ),
+    }
+)
+@websocket_api.async_response
+async def ws_subscribe_departures(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Subscribe to departures of connections (sensor entities) and stops.
+
+    The first event contains all departures of the window, following events only
+    contain departed, added and removed departures.
+    """
+    api = get_api(hass)
+
+    try:
+        await api.ensure_loaded()
+    except GtfsFileNotFound as err:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(err))
+        return
+
+    try:
+        connections = [get_entity_connection(hass, x) for x in msg[ATTR_ENTITY_ID]]
+    except HomeAssistantError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(err))
+        return
+
+    stops = {x.name: x for x in await api.stops()}
+
+    for name in msg[ATTR_STOPS]:
+        if name not in stops:
+            connection.send_error(
+                msg["id"], websocket_api.ERR_NOT_FOUND, f'Stop "{name}" not found'
+            )
+            return
+
+        connections += await api.connections(stops[name])
+
+    if not connections:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_INVALID_FORMAT, "No connection or stop given"
+        )
+        return
+
+    connections = list(dict.fromkeys(connections))
+    span = timedelta(minutes=msg[ATTR_MINUTES])
+    key = (tuple(x.uid for x in connections), span)
+    windows: dict[tuple, DepartureWindow] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        DATA_DEPARTURE_WINDOWS, {}
+    )
+
+    if (window := windows.get(key)) is None:
+        window = windows[key] = DepartureWindow(hass, api, connections, span)
+
+    # listeners of a shared window receive changes up to now before it is joined
+    await window.async_update(dt_util.now())
+
+    @callback
+    def _async_send_changes(
+        departed: list[str], added: list[dict], removed: list[str]
+    ) -> None:
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"],
+                {ATTR_DEPARTED: departed, ATTR_ADDED: added, ATTR_REMOVED: removed},
+            )
+        )
+
+    remove_listener = window.async_add_listener(_async_send_changes)
+
+    @callback
+    def _async_unsubscribe() -> None:
+        if remove_listener() and windows.get(key) is window:
+            windows.pop(key)
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+
+    connection.send_result(msg["id"])
+    connection.send_message(
+        websocket_api.event_message(msg["id"], {ATTR_DEPARTURES: window.departures})
+    )
@@ -0,0 +1,84 @@
+"""Tests of the update coordinator of the VGN Departures integration."""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.helpers.update_coordinator import UpdateFailed  # noqa: E402
+
+from custom_components.vgn_departures.coordinator import (  # noqa: E402
+    VgnUpdateCoordinator,
+)
+from custom_components.vgn_departures.vgn.data_classes import (  # noqa: E402
+    Connection,
+    TransportType,
+)
+
+
+def _connection(line_name: str, transport: TransportType) -> Connection:
+    return Connection(
+        stop_id="de:1:1",
+        name=f"Destination {line_name}",
+        line_name=line_name,
+        transport=transport,
+        direction_id=0,
+        route_ids=(line_name,),
+    )
+
+
+def test_next_departures_keeps_connection_of_each_time():
+    """Merged departures are paired with the connection they belong to."""
+    start = datetime(2024, 1, 1, 8, 0)
+    bus = _connection("31", TransportType.BUS)
+    tram = _connection("4", TransportType.TRAM)
+    coordinator = SimpleNamespace(
+        _connections=[bus, tram],
+        data={
+            bus.uid: {"times": [start, start + timedelta(minutes=10)]},
+            tram.uid: {"times": [start + timedelta(minutes=5)]},
+        },
+    )
+
+    departures = VgnUpdateCoordinator.next_departures(coordinator, count=3)
+
+    assert departures == [
+        (start, bus),
+        (start + timedelta(minutes=5), tram),
+        (start + timedelta(minutes=10), bus),
+    ]
+
+
+def test_set_timeline_keeps_statistics_of_equal_times():
+    """Timestamps and statistics are kept if equal departure times are received."""
+    start = datetime(2024, 1, 1, 8, 0)
+    bus = _connection("31", TransportType.BUS)
+    coordinator = SimpleNamespace(_timelines={}, _statistics={})
+
+    VgnUpdateCoordinator._set_timeline(coordinator, bus, [start])
+    timeline = coordinator._timelines[bus.uid]
+    coordinator._statistics[bus.uid] = object()
+
+    VgnUpdateCoordinator._set_timeline(coordinator, bus, [start])
+    assert coordinator._timelines[bus.uid] is timeline
+    assert bus.uid in coordinator._statistics
+
+    VgnUpdateCoordinator._set_timeline(coordinator, bus, [start, start])
+    assert coordinator._timelines[bus.uid] is not timeline
+    assert bus.uid not in coordinator._statistics
+
+
+def test_update_fails_while_gtfs_data_not_loaded():
+    """Updates fail with the load error until GTFS data or a snapshot is available."""
+    coordinator = SimpleNamespace(
+        title="Test",
+        _api=SimpleNamespace(loaded=False),
+        _restored=False,
+        _load_error=OSError("corrupt zip"),
+    )
+
+    with pytest.raises(UpdateFailed, match="corrupt zip"):
+        asyncio.run(VgnUpdateCoordinator._async_update_data(coordinator))
@@ -0,0 +1,198 @@
+"""Tests of incremental GTFS feed updates on two small feed generations."""
+
+import asyncio
+import os
+import zipfile
+
+import polars as pl
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.vgn_departures.vgn import (  # noqa: E402
+    api_gtfs,
+    stop_index,
+)
+
+
+def _csv(*rows: str) -> str:
+    return "".join(f"{x}\n" for x in rows)
+
+
+FEED = {
+    "agency.txt": _csv(
+        "agency_id,agency_name,agency_url,agency_timezone",
+        "a,VGN,https://www.vgn.de,Europe/Berlin",
+    ),
+    "routes.txt": _csv(
+        "route_id,agency_id,route_short_name,route_type",
+        "r1,a,1,3",
+        "r2,a,2,3",
+    ),
+    "stops.txt": _csv(
+        "stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station",
+        "S,Central,49.450,11.080,1,",
+        "s1,Central Gleis 1,49.450,11.080,0,S",
+        "s2,Market,49.455,11.085,0,",
+        "s3,Park,49.460,11.090,0,",
+        "s4,Zoo,49.470,11.100,0,",
+        "s5,Lake,49.480,11.110,0,",
+    ),
+    "calendar.txt": _csv(
+        "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date",
+        "wk,1,1,1,1,1,1,1,20260101,20261231",
+        "zoo,1,1,1,1,1,1,1,20260101,20261231",
+    ),
+    "calendar_dates.txt": _csv(
+        "service_id,date,exception_type",
+        "wk,20261024,2",
+        "wk,20261225,2",
+    ),
+    "trips.txt": _csv(
+        "route_id,service_id,trip_id,trip_headsign,direction_id",
+        "r1,wk,t1,Park,0",
+        "r1,wk,t2,Park,0",
+        "r2,zoo,t3,Lake,0",
+    ),
+    "stop_times.txt": _csv(
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence",
+        "t1,08:00:00,08:00:00,s1,1",
+        "t1,08:05:00,08:05:00,s2,2",
+        "t1,08:10:00,08:10:00,s3,3",
+        "t2,09:00:00,09:00:00,s1,1",
+        "t2,09:05:00,09:05:00,s2,2",
+        "t2,09:10:00,09:10:00,s3,3",
+        "t3,10:00:00,10:00:00,s4,1",
+        "t3,10:05:00,10:05:00,s5,2",
+    ),
+}
+
+# trip t2 removed, removal of service on 2026-10-24 taken back, stop s2 renamed
+FEED_UPDATE = {
+    **FEED,
+    "calendar_dates.txt": _csv("service_id,date,exception_type", "wk,20261225,2"),
+    "trips.txt": "\n".join(
+        x for x in FEED["trips.txt"].split("\n") if not x.startswith("r1,wk,t2")
+    ),
+    "stop_times.txt": "\n".join(
+        x for x in FEED["stop_times.txt"].split("\n") if not x.startswith("t2,")
+    ),
+    "stops.txt": FEED["stops.txt"].replace("s2,Market,", "s2,Marketplace,"),
+}
+
+
+def _write_feed(path, files: dict[str, str], mtime: int) -> None:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+
+    os.utime(path, (mtime, mtime))
+
+
+async def _departures(api: api_gtfs.ApiGtfs, date: str) -> dict[str, list[str]]:
+    """Return departure times of all connections of all stops."""
+    return {
+        f"{stop.name}/{connection.name}": [
+            x.strftime("%H:%M") for x in (await api.departures(connection, date)).times
+        ]
+        for stop in await api.stops()
+        for connection in await api.connections(stop)
+    }
+
+
+@pytest.fixture
+def feed_path(tmp_path, monkeypatch):
+    """Return path of the primary feed inside a temporary data directory."""
+    path = tmp_path / "GTFS.zip"
+
+    monkeypatch.setattr(api_gtfs, "GTFS_LOCATION", str(path))
+    monkeypatch.setattr(api_gtfs, "GTFS_DIRECTORY", str(tmp_path))
+
+    return path
+
+
+@pytest.mark.parametrize("compact_ratio", [0, 1000])
+def test_update_applies_changed_trips_calendar_and_stops(
+    feed_path, monkeypatch, compact_ratio
+):
+    """Incrementally updated data equals a fresh load, with and without compaction."""
+    monkeypatch.setattr(stop_index, "COMPACT_RATIO", compact_ratio)
+
+    async def run():
+        _write_feed(feed_path, FEED, 1_000_000)
+
+        api = api_gtfs.ApiGtfs()
+        await api.load()
+
+        assert await _departures(api, "20261023") == {
+            "Central/Park": ["08:00", "09:00"],
+            "Market/Park": ["08:05", "09:05"],
+            "Park/Park": ["08:10", "09:10"],
+            "Zoo/Lake": ["10:00"],
+            "Lake/Lake": ["10:05"],
+        }
+        assert await _departures(api, "20261024") == {
+            "Central/Park": [],
+            "Market/Park": [],
+            "Park/Park": [],
+            "Zoo/Lake": ["10:00"],
+            "Lake/Lake": ["10:05"],
+        }
+
+        zoo = (await api.stops("Zoo"))[0]
+        (to_lake,) = await api.connections(zoo)
+        unchanged = await api.departures(to_lake, "20261023")
+
+        _write_feed(feed_path, FEED_UPDATE, 2_000_000)
+
+        assert await api.update()
+
+        fresh = api_gtfs.ApiGtfs()
+        await fresh.load()
+
+        for date in ("20261023", "20261024"):
+            assert await _departures(api, date) == await _departures(fresh, date)
+
+        assert await _departures(api, "20261023") == {
+            "Central/Park": ["08:00"],
+            "Marketplace/Park": ["08:05"],
+            "Park/Park": ["08:10"],
+            "Zoo/Lake": ["10:00"],
+            "Lake/Lake": ["10:05"],
+        }
+        assert [x.name for x in await api.stops("Market")] == ["Marketplace"]
+
+        # stops not served by a changed trip keep their version and cached results
+        assert api._stop_index.version("s4") == 0
+        assert api._stop_index.version("s1") == 1
+        assert await api.departures(to_lake, "20261023") is unchanged
+
+        assert not await api.update()
+
+    asyncio.run(run())
+
+
+def test_stop_index_replace_and_compaction():
+    """Replaced stops are served from the overlay and merged on compaction."""
+    frame = pl.DataFrame(
+        {"stop_id": ["a", "a", "b", "c"], "trip_id": ["1", "2", "1", "1"]}
+    )
+    index = stop_index.StopIndex(frame)
+
+    index.replace(
+        {"a", "b"},
+        stop_index.StopIndex.partition(
+            pl.DataFrame({"stop_id": ["a"], "trip_id": ["3"]}), {"a", "b"}
+        ),
+    )
+
+    assert index.stop_times("a").rows() == [("a", "3")]
+    assert "b" not in index
+    assert sorted(index.frame().rows()) == [("a", "3"), ("c", "1")]
+    assert index.needs_compaction
+
+    compacted = index.compacted()
+
+    assert compacted.frame().rows() == [("a", "3"), ("c", "1")]
+    assert not compacted.needs_compaction
+    assert [compacted.version(x) for x in "abc"] == [1, 1, 0]
@@ -0,0 +1,50 @@
+"""Tests of the Connection Scan journey planner."""
+
+import polars as pl
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.vgn_departures.vgn.journey import (  # noqa: E402
+    JourneyPlanner,
+)
+
+STOPS = pl.DataFrame({"stop_id": ["a", "b", "c"]})
+TRIPS = pl.DataFrame({"trip_id": ["night", "day"]})
+# the night trip of a service day runs after midnight, the day trip continues from b
+STOP_TIMES = pl.DataFrame(
+    {
+        "trip_id": ["night", "night", "day", "day"],
+        "stop_id": ["a", "b", "b", "c"],
+        "stop_sequence": [1, 2, 1, 2],
+        "departure_time": [24 * 3600 + 600, None, 1800, None],
+        "arrival_time": [None, 24 * 3600 + 1200, None, 2400],
+    }
+)
+
+
+@pytest.fixture
+def planner() -> JourneyPlanner:
+    """Return planner of the two trips."""
+    return JourneyPlanner.build(STOPS, STOP_TIMES, TRIPS, None)
+
+
+def test_journey_boards_trip_of_previous_service_day(planner):
+    """Trips of the previous service day are boarded after midnight."""
+    active = planner.trip_mask(["day"])
+    previous = planner.trip_mask(["night"])
+
+    assert planner.earliest_arrival(["a"], ["c"], 300, active, previous) == [
+        ("night", "a", "b", 600, 1200),
+        ("day", "b", "c", 1800, 2400),
+    ]
+
+
+def test_journey_without_previous_service_day(planner):
+    """Without trips of the previous day the night trip is not reachable."""
+    active = planner.trip_mask(["day"])
+
+    assert planner.earliest_arrival(["a"], ["c"], 300, active) is None
+    assert planner.earliest_arrival(["b"], ["c"], 300, active) == [
+        ("day", "b", "c", 1800, 2400)
+    ]
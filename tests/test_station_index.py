@@ -0,0 +1,39 @@
+"""Tests of the parent station index of GTFS stops."""
+
+import polars as pl
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.vgn_departures.vgn.stop_index import (  # noqa: E402
+    StationIndex,
+)
+
+
+@pytest.mark.parametrize(
+    "location_types",
+    [["1", "0", "0", ""], [1, 0, 0, None]],
+    ids=["string", "numeric"],
+)
+def test_stops_are_grouped_by_station(location_types):
+    """Platforms are grouped by their station for string and numeric location types."""
+    index = StationIndex(
+        pl.DataFrame(
+            {
+                "stop_id": ["S", "s1", "s2", "m"],
+                "stop_name": ["Central", "Central 1", "Central 2", "Market"],
+                "location_type": location_types,
+                "parent_station": [None, "S", "S", None],
+            }
+        )
+    )
+
+    assert [(x.name, x.ids, x.is_parent) for x in index.stops()] == [
+        ("Central", ("s1", "s2"), True),
+        ("Market", ("m",), False),
+    ]
+    assert index.stops("central", incl_parents=True)[0].ids == ("s1", "s2", "S")
+    assert [x.name for x in index.stops_of(["m", "s2", "unknown", "s1"])] == [
+        "Market",
+        "Central",
+    ]
@@ -0,0 +1,52 @@
+"""Tests of service statistics derived from departure times."""
+
+import datetime as dt
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.vgn_departures.vgn.helpers import TIMEZONE  # noqa: E402
+from custom_components.vgn_departures.vgn.statistics import (  # noqa: E402
+    departure_statistics,
+    timestamps,
+    window_bounds,
+)
+
+TIMES = [
+    dt.datetime(2024, 1, 1, 22, 0, tzinfo=TIMEZONE),
+    dt.datetime(2024, 1, 1, 22, 30, tzinfo=TIMEZONE),
+    dt.datetime(2024, 1, 1, 23, 0, tzinfo=TIMEZONE),
+    # trip of the same service day after midnight
+    dt.datetime(2024, 1, 2, 0, 30, tzinfo=TIMEZONE),
+]
+
+
+def _statistics(now: dt.datetime):
+    series = timestamps(TIMES)
+
+    return departure_statistics(series, window_bounds(series, now))
+
+
+def test_statistics_of_remaining_departures():
+    """Next hour and rest of the day are counted from now."""
+    statistics = _statistics(dt.datetime(2024, 1, 1, 22, 10, tzinfo=TIMEZONE))
+
+    assert statistics.next_departure == TIMES[1]
+    assert statistics.headway == 30
+    assert statistics.remaining_today == 2
+    assert statistics.last_departure_today == TIMES[2]
+
+
+def test_last_departure_today_is_kept_after_it_has_left():
+    """Last departure of today stays known until midnight."""
+    statistics = _statistics(dt.datetime(2024, 1, 1, 23, 10, tzinfo=TIMEZONE))
+
+    assert statistics.next_departure == TIMES[3]
+    assert statistics.remaining_today == 0
+    assert statistics.last_departure_today == TIMES[2]
+
+    statistics = _statistics(dt.datetime(2024, 1, 2, 1, 0, tzinfo=TIMEZONE))
+
+    assert statistics.next_departure is None
+    assert statistics.last_departure_today == TIMES[3]